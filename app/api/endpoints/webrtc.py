@@ -1,13 +1,95 @@
-from fastapi import APIRouter, Depends, HTTPException, Path
+import asyncio
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from typing import List, Dict, Any
+import numpy as np
+import orjson
+from pydantic import TypeAdapter
 
 
 from app.models.webrtc import WebRTCOffer, WebRTCAnswer, WebRTCStatus, ICECandidate
-from app.services.webrtc_manager import WebRTCManager, safe_len
+from app.services.webrtc_manager import WebRTCManager, safe_convert_vertices, safe_len
 from app.api.dependencies import get_webrtc_manager
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
+# Arrays above this many elements are encoded off the event loop
+EXECUTOR_MIN_ELEMENTS = 10_000
+# Binary point clouds larger than this are streamed in chunks of this size
+STREAM_CHUNK_BYTES = 64 * 1024
+
+# Serializers for the polled list endpoints, built once instead of per request
+_SESSIONS_ADAPTER = TypeAdapter(List[WebRTCStatus])
+_ICE_CANDIDATES_ADAPTER = TypeAdapter(List[Dict[str, Any]])
+
+def _encode_pointcloud(device_id: str, vertices: Any, metadata: Dict[str, Any]) -> bytes:
+    """Encode point cloud vertices and frame info as a JSON body."""
+    if isinstance(vertices, np.ndarray):
+        vertices = np.ascontiguousarray(vertices, dtype=np.float32)
+        vertex_count = len(vertices)
+    else:
+        vertices = safe_convert_vertices(vertices)
+        vertex_count = safe_len(vertices)
+
+    return orjson.dumps(
+        {
+            "success": True,
+            "device_id": device_id,
+            "vertices": vertices,
+            "vertex_count": vertex_count,
+            "timestamp": metadata.get("timestamp", 0),
+            "frame_number": metadata.get("frame_number", 0)
+        },
+        option=orjson.OPT_SERIALIZE_NUMPY,
+    )
+
+async def _pointcloud_body(
+    webrtc_manager: WebRTCManager, device_id: str, frame_number: int, vertices: Any, metadata: Dict[str, Any]
+) -> bytes:
+    """Encode a frame's point cloud body once, however many requests poll for it at the same time."""
+    loop = asyncio.get_running_loop()
+    while True:
+        # Repeated polls for the same frame reuse the encoded body
+        cached = webrtc_manager.pointcloud_cache.get(device_id)
+        if cached is not None and cached[0] == frame_number:
+            return cached[1]
+
+        inflight = webrtc_manager.pointcloud_inflight.get(device_id)
+        if inflight is not None and inflight[0] == frame_number:
+            # Another request is already encoding this frame; wait for its result
+            body = await asyncio.shield(inflight[1])
+            if body is not None:
+                return body
+            # That request was cancelled before finishing; take over the encode
+            continue
+
+        future = loop.create_future()
+        webrtc_manager.pointcloud_inflight[device_id] = (frame_number, future)
+        try:
+            if getattr(vertices, 'size', 0) > EXECUTOR_MIN_ELEMENTS:
+                body = await loop.run_in_executor(None, _encode_pointcloud, device_id, vertices, metadata)
+            else:
+                body = _encode_pointcloud(device_id, vertices, metadata)
+            webrtc_manager.pointcloud_cache[device_id] = (frame_number, body)
+            future.set_result(body)
+            return body
+        except asyncio.CancelledError:
+            # Only this request is gone; waiters see None and encode the frame themselves
+            future.set_result(None)
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Waiters (if any) see the exception; don't warn when there are none
+            future.exception()
+            raise
+        finally:
+            if webrtc_manager.pointcloud_inflight.get(device_id, (None, None))[1] is future:
+                del webrtc_manager.pointcloud_inflight[device_id]
+
+
 @router.post("/offer", response_model=Dict[str, Any])
 async def create_offer(
     offer_request: WebRTCOffer,
@@ -26,34 +108,15 @@ async def create_offer(
             offer_request.device_id,
             offer_request.stream_types
         )
-        return {
-            "session_id": session_id,
-            "sdp": offer["sdp"],
-            "type": offer["type"]
-        }
     except Exception as e:
-        # Log the error for debugging
-        print(f"Error creating WebRTC offer: {type(e).__name__}: {str(e)}")
-        
-        # Handle RealSenseError specifically
-        if hasattr(e, 'detail') and hasattr(e, 'status_code'):
-            # This is a RealSenseError
-            raise HTTPException(status_code=e.status_code, detail=e.detail)
-        
-        # Return a more informative error message for other exceptions
-        error_message = str(e)
-        if "Failed to start device stream" in error_message:
-            raise HTTPException(status_code=400, detail=f"Failed to start device stream: {error_message}")
-        elif "Stream type" in error_message and "not active" in error_message:
-            raise HTTPException(status_code=400, detail=f"Stream type not available: {error_message}")
-        elif "Device" in error_message and "not streaming" in error_message:
-            raise HTTPException(status_code=400, detail=f"Device not streaming: {error_message}")
-        elif "Maximum concurrent sessions" in error_message:
-            raise HTTPException(status_code=429, detail=error_message)
-        elif "Invalid stream type" in error_message:
-            raise HTTPException(status_code=400, detail=error_message)
-        else:
-            raise HTTPException(status_code=400, detail=f"Failed to create WebRTC offer: {error_message}")
+        # Log and let the app's exception handlers map it to a response
+        logger.warning("offer failed", exc_info=e)
+        raise
+    return {
+        "session_id": session_id,
+        "sdp": offer["sdp"],
+        "type": offer["type"]
+    }
 
 @router.post("/answer", response_model=dict)
 async def process_answer(
@@ -63,15 +126,12 @@ async def process_answer(
     """
     Process a WebRTC answer from a client.
     """
-    try:
-        result = await webrtc_manager.process_answer(
-            answer.session_id,
-            answer.sdp,
-            answer.type
-        )
-        return {"success": result}
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+    result = await webrtc_manager.process_answer(
+        answer.session_id,
+        answer.sdp,
+        answer.type
+    )
+    return {"success": result}
 
 @router.post("/ice-candidates", response_model=dict)
 async def add_ice_candidate(
@@ -81,20 +141,31 @@ async def add_ice_candidate(
     """
     Add an ICE candidate to a WebRTC session.
     """
-    try:
-        result = await webrtc_manager.add_ice_candidate(
-            candidate.session_id,
-            candidate.candidate,
-            candidate.sdpMid,
-            candidate.sdpMLineIndex
-        )
-        return {"success": result}
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+    result = await webrtc_manager.add_ice_candidate(
+        candidate.session_id,
+        candidate.candidate,
+        candidate.sdpMid,
+        candidate.sdpMLineIndex
+    )
+    return {"success": result}
+
+@router.post("/ice-candidates/batch", response_model=Dict[str, Any])
+async def add_ice_candidates(
+    candidates: List[ICECandidate],
+    webrtc_manager: WebRTCManager = Depends(get_webrtc_manager),
+):
+    """
+    Add several ICE candidates in one request.
+
+    Clients gathering candidates via trickle ICE can buffer them briefly
+    and submit them together instead of posting each one separately.
+    """
+    added = await webrtc_manager.add_ice_candidates(candidates)
+    return {"success": True, "added": added}
 
 @router.get("/sessions", response_model=List[WebRTCStatus])
 async def list_all_sessions(
-    webrtc_manager: WebRTCManager = Depends(get_webrtc_manager),
+    request: Request,
 ):
     """
     Get the status of all active WebRTC sessions.
@@ -102,28 +173,25 @@ async def list_all_sessions(
     This endpoint shows all currently active browser connections
     and their streaming status.
     """
-    try:
-        return await webrtc_manager.get_all_sessions()
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    webrtc_manager: WebRTCManager = request.app.state.webrtc_manager
+    sessions = await webrtc_manager.get_all_sessions()
+    return Response(content=_SESSIONS_ADAPTER.dump_json(sessions), media_type="application/json")
 
 @router.get("/sessions/{session_id}", response_model=WebRTCStatus)
 async def get_session_status(
+    request: Request,
     session_id: str,
-    webrtc_manager: WebRTCManager = Depends(get_webrtc_manager),
 ):
     """
     Get the status of a specific WebRTC session.
     """
-    try:
-        return await webrtc_manager.get_session(session_id)
-    except Exception as e:
-        raise HTTPException(status_code=404, detail=str(e))
+    webrtc_manager: WebRTCManager = request.app.state.webrtc_manager
+    return await webrtc_manager.get_session(session_id)
 
 @router.get("/sessions/{session_id}/ice-candidates", response_model=List[Dict[str, Any]])
 async def get_ice_candidates(
-    session_id: str = Path(..., description="WebRTC session ID"),
-    webrtc_manager: WebRTCManager = Depends(get_webrtc_manager),
+    request: Request,
+    session_id: str,
 ):
     """
     Get ICE candidates for a WebRTC session.
@@ -131,15 +199,13 @@ async def get_ice_candidates(
     This endpoint returns all ICE candidates that have been generated
     for the specified WebRTC session.
     """
-    try:
-        candidates = await webrtc_manager.get_ice_candidates(session_id)
-        return candidates
-    except Exception as e:
-        raise HTTPException(status_code=404, detail=str(e))
+    webrtc_manager: WebRTCManager = request.app.state.webrtc_manager
+    candidates = await webrtc_manager.get_ice_candidates(session_id)
+    return Response(content=_ICE_CANDIDATES_ADAPTER.dump_json(candidates), media_type="application/json")
 
 @router.delete("/sessions/{session_id}", response_model=Dict[str, bool])
 async def close_session(
-    session_id: str = Path(..., description="WebRTC session ID"),
+    session_id: str,
     webrtc_manager: WebRTCManager = Depends(get_webrtc_manager),
 ):
     """
@@ -149,11 +215,8 @@ async def close_session(
     All associated resources will be freed. The device stream will only be
     stopped if no other sessions are using it.
     """
-    try:
-        result = await webrtc_manager.close_session(session_id)
-        return {"success": result}
-    except Exception as e:
-        raise HTTPException(status_code=404, detail=str(e))
+    result = await webrtc_manager.close_session(session_id)
+    return {"success": result}
 
 @router.delete("/sessions", response_model=Dict[str, int])
 async def close_all_sessions(
@@ -165,15 +228,12 @@ async def close_all_sessions(
     This endpoint terminates all WebRTC connections and removes all sessions.
     Useful for cleanup or when restarting the streaming service.
     """
-    try:
-        closed_count = await webrtc_manager.close_all_sessions()
-        return {"closed_sessions": closed_count}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    closed_count = await webrtc_manager.close_all_sessions()
+    return {"closed_sessions": closed_count}
 
 @router.get("/stream-references", response_model=Dict[str, Any])
 async def get_stream_references(
-    webrtc_manager: WebRTCManager = Depends(get_webrtc_manager),
+    request: Request,
 ):
     """
     Get information about stream references for debugging.
@@ -182,71 +242,98 @@ async def get_stream_references(
     independent browser connections. Useful for debugging session
     management and understanding which browsers are using which streams.
     """
-    try:
-        return await webrtc_manager.get_stream_reference_info()
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    webrtc_manager: WebRTCManager = request.app.state.webrtc_manager
+    return Response(content=await webrtc_manager.get_stream_reference_info_json(), media_type="application/json")
 
 @router.get("/pointcloud-data/{device_id}", response_model=Dict[str, Any])
 async def get_pointcloud_data(
-    device_id: str = Path(..., description="The device ID to get point cloud data from"),
-    webrtc_manager: WebRTCManager = Depends(get_webrtc_manager),
+    request: Request,
+    device_id: str,
 ):
     """
     Get raw point cloud data for 3D rendering.
     This endpoint provides the actual 3D vertex data that can be used
     to create interactive 3D visualizations in the browser.
+
+    Responses carry a weak ETag derived from the frame number, so pollers can
+    send `If-None-Match` and receive `304 Not Modified` until a new frame arrives.
     """
+    webrtc_manager: WebRTCManager = request.app.state.webrtc_manager
+    # Get the RealSense manager from the WebRTC manager
+    realsense_manager = webrtc_manager.realsense_manager
+    
+    # Get the latest point cloud data
     try:
-        # Get the RealSense manager from the WebRTC manager
-        realsense_manager = webrtc_manager.realsense_manager
+        # Get depth frame metadata which contains point cloud data
+        metadata = realsense_manager.get_latest_metadata(device_id, "depth")
         
-        # Get the latest point cloud data
-        try:
-            # Get depth frame metadata which contains point cloud data
-            metadata = realsense_manager.get_latest_metadata(device_id, "depth")
-            
-            vertices_data = metadata.get("point_cloud", {}).get("vertices")
-            if "point_cloud" in metadata and vertices_data is not None:
-                vertices = metadata["point_cloud"]["vertices"]
-                
-                # Convert numpy array to list for JSON serialization safely
-                if hasattr(vertices, 'tolist'):
-                    try:
-                        vertices_list = vertices.tolist()
-                    except Exception as e:
-                        print(f"❌ Error converting NumPy array to list in webrtc.py: {e}")
-                        vertices_list = []
-                elif isinstance(vertices, list):
-                    vertices_list = vertices
-                else:
-                    try:
-                        vertices_list = list(vertices)
-                    except Exception as e:
-                        print(f"❌ Error converting vertices to list in webrtc.py: {e}")
-                        vertices_list = []
-                
-                return {
-                    "success": True,
-                    "device_id": device_id,
-                    "vertices": vertices_list,
-                    "vertex_count": safe_len(vertices_list),
-                    "timestamp": metadata.get("timestamp", 0),
-                    "frame_number": metadata.get("frame_number", 0)
-                }
-            else:
-                return {
-                    "success": False,
-                    "error": "No point cloud data available",
-                    "device_id": device_id
-                }
-                
-        except Exception as e:
+        point_cloud = metadata.get("point_cloud")
+        vertices = point_cloud.get("vertices") if point_cloud else None
+        if vertices is not None:
+            frame_number = metadata.get("frame_number", 0)
+            etag = f'W/"{device_id}-{frame_number}"'
+            if request.headers.get("if-none-match") == etag:
+                return Response(status_code=304, headers={"ETag": etag})
+
+            body = await _pointcloud_body(webrtc_manager, device_id, frame_number, vertices, metadata)
+            return Response(content=body, media_type="application/json", headers={"ETag": etag})
+        else:
             return {
                 "success": False,
-                "error": f"Failed to get point cloud data: {str(e)}",
+                "error": "No point cloud data available",
                 "device_id": device_id
             }
-            
+
     except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Failed to get point cloud data: {str(e)}")
\ No newline at end of file
+        return {
+            "success": False,
+            "error": f"Failed to get point cloud data: {str(e)}",
+            "device_id": device_id
+        }
+
+@router.get("/pointcloud-data/{device_id}/binary")
+async def get_pointcloud_binary(
+    request: Request,
+    device_id: str,
+):
+    """
+    Get raw point cloud data as a packed binary buffer.
+
+    The response body holds the vertices as little-endian float32 x/y/z triplets,
+    ready to be wrapped in a `Float32Array` by the browser. The vertex count and
+    frame number are returned in the `X-Vertex-Count` and `X-Frame-Number` headers.
+    Like the JSON variant, it honours `If-None-Match` against the frame's weak ETag.
+    """
+    webrtc_manager: WebRTCManager = request.app.state.webrtc_manager
+    metadata = webrtc_manager.realsense_manager.get_latest_metadata(device_id, "depth")
+
+    point_cloud = metadata.get("point_cloud")
+    vertices = point_cloud.get("vertices") if point_cloud else None
+    if vertices is None:
+        raise HTTPException(status_code=404, detail="No point cloud data available")
+
+    frame_number = metadata.get("frame_number", 0)
+    etag = f'W/"{device_id}-{frame_number}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    vertices = np.ascontiguousarray(vertices, dtype="<f4").reshape(-1, 3)
+    headers = {
+        "ETag": etag,
+        "X-Vertex-Count": str(vertices.shape[0]),
+        "X-Frame-Number": str(frame_number),
+        # Raw float32 barely compresses; keep GZipMiddleware from spending CPU on it
+        "Content-Encoding": "identity",
+    }
+    if vertices.nbytes <= STREAM_CHUNK_BYTES:
+        return Response(content=vertices.tobytes(), media_type="application/octet-stream", headers=headers)
+
+    # Large clouds are streamed so the first bytes go out without building one big body
+    buffer = memoryview(vertices).cast("B")
+    headers["Content-Length"] = str(buffer.nbytes)
+
+    async def iter_chunks():
+        for offset in range(0, buffer.nbytes, STREAM_CHUNK_BYTES):
+            yield bytes(buffer[offset:offset + STREAM_CHUNK_BYTES])
+
+    return StreamingResponse(iter_chunks(), media_type="application/octet-stream", headers=headers)
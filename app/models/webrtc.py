@@ -1,7 +1,12 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Dict, List, Optional, Any
 
+# Request bodies are read-only once parsed
+_REQUEST_MODEL_CONFIG = ConfigDict(frozen=True, extra="ignore", str_strip_whitespace=False)
+
 class WebRTCOffer(BaseModel):
+    model_config = _REQUEST_MODEL_CONFIG
+
     device_id: str
     stream_types: List[str]  # Types of streams to include (color, depth, etc.)
 
@@ -11,11 +16,15 @@ class WebRTCSession(BaseModel):
     stream_types: List[str]
 
 class WebRTCAnswer(BaseModel):
+    model_config = _REQUEST_MODEL_CONFIG
+
     session_id: str
     sdp: str
     type: str
 
 class ICECandidate(BaseModel):
+    model_config = _REQUEST_MODEL_CONFIG
+
     session_id: str
     candidate: str
     sdpMid: str
@@ -27,4 +36,5 @@ class WebRTCStatus(BaseModel):
     connected: bool
     streaming: bool
     stream_types: List[str]
-    stats: Optional[Dict[str, Any]] = None
\ No newline at end of file
+    stats: Optional[Dict[str, Any]] = None
+    dropped_frames: int = 0  # frames skipped because the receiver fell behind
\ No newline at end of file
@@ -1,9 +1,12 @@
 import base64
+import logging
 import time
 import threading
 from typing import Optional, Dict
 import asyncio
 
+logger = logging.getLogger(__name__)
+
 
 class MetadataSocketServer:
     """
@@ -40,7 +43,7 @@ class MetadataSocketServer:
 
     def _broadcast_metadata_loop(self):
         """The core loop that fetches and broadcasts metadata."""
-        print("[MetadataBroadcaster] Starting broadcast loop...")
+        logger.info("[MetadataBroadcaster] Starting broadcast loop...")
 
         if not self._async_loop:
             self._async_loop = asyncio.new_event_loop()
@@ -62,12 +65,12 @@ class MetadataSocketServer:
                 if is_streaming:
                     active_streams = status.active_streams
             except Exception as e:
-                print(
-                    f"[MetadataBroadcaster] Error getting stream status for {self._target_device_id}: {e}"
+                logger.warning(
+                    "[MetadataBroadcaster] Error getting stream status for %s: %s", self._target_device_id, e
                 )
                 active_streams = []
             except Exception as e:
-                print(f"[MetadataBroadcaster] Unexpected error getting status: {e}")
+                logger.warning("[MetadataBroadcaster] Unexpected error getting status: %s", e)
                 active_streams = []
 
             all_metadata: Dict[str, Optional[Dict]] = {}
@@ -110,8 +113,8 @@ class MetadataSocketServer:
                 # Use helper method to handle emit appropriately
                 self._emit_event("metadata_update", payload)
             except Exception as e:
-                print(
-                    f"[MetadataBroadcaster] Error emitting 'metadata_update' event: {e}"
+                logger.warning(
+                    "[MetadataBroadcaster] Error emitting 'metadata_update' event: %s", e
                 )
 
             # --- Sleep ---
@@ -119,7 +122,7 @@ class MetadataSocketServer:
             sleep_duration = max(0, self._update_interval - elapsed_time)
             time.sleep(sleep_duration)
 
-        print("[MetadataBroadcaster] Broadcast loop stopped.")
+        logger.info("[MetadataBroadcaster] Broadcast loop stopped.")
 
     def start_broadcast(self, device_id: str):
         """Starts the metadata broadcast loop as a background thread."""
@@ -138,8 +141,8 @@ class MetadataSocketServer:
         )
         self._broadcast_thread.start()
 
-        print(
-            f"[MetadataBroadcaster] Broadcast loop started for device: {self._target_device_id}"
+        logger.info(
+            "[MetadataBroadcaster] Broadcast loop started for device: %s", self._target_device_id
         )
 
     def stop_broadcast(self):
@@ -147,7 +150,7 @@ class MetadataSocketServer:
         if not self._is_broadcasting or not self._broadcast_thread:
             return
 
-        print("[MetadataBroadcaster] Stopping broadcast loop...")
+        logger.info("[MetadataBroadcaster] Stopping broadcast loop...")
         self._is_broadcasting = False
         self._thread_stop_event.set()
 
@@ -164,4 +167,4 @@ class MetadataSocketServer:
 
         self._broadcast_thread = None
         self._target_device_id = None
-        print("[MetadataBroadcaster] Broadcast loop stopped.")
+        logger.info("[MetadataBroadcaster] Broadcast loop stopped.")
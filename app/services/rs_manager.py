@@ -1,6 +1,7 @@
+import logging
 import threading
 import time
-from typing import Dict, List, Optional, Any, Tuple, Set
+from typing import Callable, Dict, List, Optional, Any, Tuple, Set
 import pyrealsense2 as rs
 import numpy as np
 import cv2
@@ -13,6 +14,8 @@ import socketio
 
 from app.services.metadata_socket_server import MetadataSocketServer
 
+logger = logging.getLogger(__name__)
+
 def safe_convert_vertices(vertices):
     """Safely convert vertices to a Python list, handling NumPy arrays and other types."""
     if vertices is None:
@@ -27,19 +30,19 @@ def safe_convert_vertices(vertices):
         try:
             return vertices.tolist()
         except Exception as e:
-            print(f"❌ Error converting NumPy array to list: {e}")
+            logger.warning("❌ Error converting NumPy array to list: %s", e)
             return []
     
     # If it's a string, it's corrupted data
     if isinstance(vertices, str):
-        print(f"❌ Vertices is a string (corrupted data), returning empty list")
+        logger.warning("❌ Vertices is a string (corrupted data), returning empty list")
         return []
     
     # Try to convert to list
     try:
         return list(vertices)
     except Exception as e:
-        print(f"❌ Cannot convert vertices to list: {type(vertices)}, error: {e}")
+        logger.warning("❌ Cannot convert vertices to list: %s, error: %s", type(vertices), e)
         return []
 
 def safe_len(vertices):
@@ -47,12 +50,9 @@ def safe_len(vertices):
     if vertices is None:
         return 0
     
-    # Convert to list first if it's a NumPy array
-    if hasattr(vertices, 'tolist'):
-        try:
-            vertices = vertices.tolist()
-        except Exception:
-            return 0
+    # Arrays know their length; never materialize them as lists
+    if isinstance(vertices, np.ndarray):
+        return vertices.shape[0] if vertices.ndim else 0
     
     # Now it should be a list or similar
     try:
@@ -61,6 +61,29 @@ def safe_len(vertices):
         return 0
 
 
+class FrameDoubleBuffer:
+    """Front/back frame pair for one stream.
+
+    The capture thread hands publish() a freshly allocated array that nothing
+    else references, and publishing swaps it to the front by reference. A
+    published array is never written to again, so readers can keep the array
+    read() returns for as long as they like without copying it or holding a lock.
+    """
+
+    def __init__(self):
+        self._front: Optional[np.ndarray] = None
+        self._back: Optional[np.ndarray] = None
+
+    def publish(self, frame: np.ndarray):
+        """Publish a frame the caller owns and will not modify afterwards."""
+        self._back = frame
+        self._front, self._back = self._back, self._front
+
+    def read(self) -> Optional[np.ndarray]:
+        """The published frame; treat it as read-only."""
+        return self._front
+
+
 class RealSenseManager:
     def __init__(self, sio: socketio.AsyncServer):
         self.ctx = rs.context()
@@ -68,19 +91,30 @@ class RealSenseManager:
         self.device_infos: Dict[str, DeviceInfo] = {}
         self.pipelines: Dict[str, rs.pipeline] = {}
         self.configs: Dict[str, rs.config] = {}
+        self.stream_configs: Dict[str, Dict[str, StreamConfig]] = (
+            {}
+        )  # device_id -> stream_type -> config the pipeline was started with
         self.active_streams: Dict[str, Set[str]] = (
             {}
         )  # device_id -> set of stream types
-        self.frame_queues: Dict[str, Dict[str, List]] = (
+        self.frame_buffers: Dict[str, Dict[str, FrameDoubleBuffer]] = (
             {}
-        )  # device_id -> stream_type -> list of frames
+        )  # device_id -> stream_type -> latest frame buffers
         self.metadata_queues: Dict[str, Dict[str, List[Dict]]] = (
             {}
         )  # device_id -> stream_type -> list of metadata dicts
+        self.align_processors: Dict[str, Tuple[str, rs.align]] = (
+            {}
+        )  # device_id -> (stream name frames are aligned to, align processor)
         self.lock = threading.Lock()
         self.max_queue_size = 5
+        self.frame_listeners: Dict[str, List[Callable[[], None]]] = (
+            {}
+        )  # device_id -> callbacks fired from the capture thread after each frameset
         self.is_pointcloud_enabled: Dict[str, bool] = {}
         self.pc = rs.pointcloud()
+        # Shared depth colorizer; only used by collection threads while holding self.lock
+        self.colorizer = rs.colorizer()
 
         self.metadata_socket_server = MetadataSocketServer(sio, self)
 
@@ -409,30 +443,10 @@ class RealSenseManager:
                 status_code=500, detail=f"Failed to set option: {str(e)}"
             )
 
-    def start_stream(
-        self,
-        device_id: str,
-        configs: List[StreamConfig],
-        align_to: Optional[str] = None,
-    ) -> StreamStatus:
-        """Start streaming from a device"""
-        self.refresh_devices()
-        if device_id not in self.devices:
-            if device_id not in self.devices:
-                raise RealSenseError(
-                    status_code=404, detail=f"Device {device_id} not found"
-                )
-
-        # Stop existing stream if running
-        if device_id in self.pipelines:
-            return StreamStatus(
-                device_id=device_id,
-                is_streaming=True,
-                active_streams=list(self.active_streams[device_id]),
-            )
-
-        # Initialize pipeline and config
-        pipeline = rs.pipeline(self.ctx)
+    def _build_rs_config(
+        self, device_id: str, configs: List[StreamConfig]
+    ) -> Tuple[rs.config, Set[str]]:
+        """Translate stream configs into a pipeline config and the set of stream types it enables"""
         config = rs.config()
         config.enable_device(device_id)
 
@@ -516,6 +530,34 @@ class RealSenseManager:
                     status_code=400, detail=f"Failed to enable stream: {str(e)}"
                 )
 
+        return config, active_streams
+
+    def start_stream(
+        self,
+        device_id: str,
+        configs: List[StreamConfig],
+        align_to: Optional[str] = None,
+    ) -> StreamStatus:
+        """Start streaming from a device"""
+        self.refresh_devices()
+        if device_id not in self.devices:
+            if device_id not in self.devices:
+                raise RealSenseError(
+                    status_code=404, detail=f"Device {device_id} not found"
+                )
+
+        # Stop existing stream if running
+        if device_id in self.pipelines:
+            return StreamStatus(
+                device_id=device_id,
+                is_streaming=True,
+                active_streams=list(self.active_streams[device_id]),
+            )
+
+        # Initialize pipeline and config
+        pipeline = rs.pipeline(self.ctx)
+        config, active_streams = self._build_rs_config(device_id, configs)
+
         # Start streaming
         try:
             pipeline_profile = pipeline.start(config)
@@ -531,24 +573,31 @@ class RealSenseManager:
                         break
 
                 if align_stream:
-                    align_processor = rs.align(align_stream)
+                    align_processor = (align_stream.name, rs.align(align_stream))
 
             # Store pipeline and config
             with self.lock:
                 self.pipelines[device_id] = pipeline
                 self.configs[device_id] = config
+                self.stream_configs[device_id] = {
+                    stream_config.stream_type: stream_config for stream_config in configs
+                }
                 self.active_streams[device_id] = active_streams
-                self.frame_queues[device_id] = {
-                    stream_type: [] for stream_type in active_streams
+                self.frame_buffers[device_id] = {
+                    stream_type: FrameDoubleBuffer() for stream_type in active_streams
                 }
                 self.metadata_queues[device_id] = {
                     stream_key: [] for stream_key in active_streams
                 }
+                if align_processor:
+                    self.align_processors[device_id] = align_processor
+                else:
+                    self.align_processors.pop(device_id, None)
 
             # Start frame collection thread
             threading.Thread(
                 target=self._collect_frames,
-                args=(device_id, align_processor),
+                args=(device_id,),
                 daemon=True,
             ).start()
 
@@ -589,13 +638,15 @@ class RealSenseManager:
                 del self.pipelines[device_id]
                 if device_id in self.configs:
                     del self.configs[device_id]
+                self.stream_configs.pop(device_id, None)
+                self.align_processors.pop(device_id, None)
                 if device_id in self.active_streams:
                     active_streams = list(self.active_streams[device_id])
                     del self.active_streams[device_id]
                 else:
                     active_streams = []
-                if device_id in self.frame_queues:
-                    del self.frame_queues[device_id]
+                if device_id in self.frame_buffers:
+                    del self.frame_buffers[device_id]
                 if device_id in self.metadata_queues:
                     del self.metadata_queues[device_id]
 
@@ -613,6 +664,118 @@ class RealSenseManager:
                     status_code=500, detail=f"Failed to stop streaming: {str(e)}"
                 )
 
+    def enable_stream(self, device_id: str, stream_config: StreamConfig) -> StreamStatus:
+        """Add a stream to a running device without dropping the buffers of its other streams"""
+        return self.update_streams(device_id, added=[stream_config])
+
+    def disable_stream(self, device_id: str, stream_type: str) -> StreamStatus:
+        """Remove a stream from a running device without dropping the buffers of its other streams"""
+        return self.update_streams(device_id, removed=[stream_type])
+
+    def update_streams(
+        self,
+        device_id: str,
+        added: Optional[List[StreamConfig]] = None,
+        removed: Optional[List[str]] = None,
+    ) -> StreamStatus:
+        """Add and remove streams on a device with at most one pipeline restart.
+
+        Streams that are already running are left alone, so the pipeline is not
+        touched at all when nothing actually changes.
+        """
+        with self.lock:
+            running = device_id in self.pipelines
+            current = self.stream_configs.get(device_id, {})
+            configs = dict(current)
+
+        for stream_type in removed or []:
+            configs.pop(stream_type, None)
+        for stream_config in added or []:
+            configs.setdefault(stream_config.stream_type, stream_config)
+
+        if not running:
+            if not configs:
+                return self.get_stream_status(device_id)
+            return self.start_stream(device_id, list(configs.values()))
+        if configs.keys() == current.keys():
+            return self.get_stream_status(device_id)
+        if not configs:
+            return self.stop_stream(device_id)
+        return self._swap_pipeline(device_id, list(configs.values()))
+
+    def _swap_pipeline(self, device_id: str, configs: List[StreamConfig]) -> StreamStatus:
+        """Restart a running device's pipeline with new configs, keeping the collection thread
+        and the frame buffers of streams present in both configurations"""
+        config, active_streams = self._build_rs_config(device_id, configs)
+
+        with self.lock:
+            old_pipeline = self.pipelines[device_id]
+            old_config = self.configs[device_id]
+            align = self.align_processors.get(device_id)
+        # Alignment carries over only while the stream it aligns to is still configured
+        keep_align = align is not None and any(
+            stream_config.stream_type.split("-")[0].lower() == align[0].lower()
+            for stream_config in configs
+        )
+
+        # The sensors can't be opened twice, so the old pipeline has to stop first.
+        # The collection thread keeps polling self.pipelines and picks up the new one.
+        pipeline = rs.pipeline(self.ctx)
+        try:
+            old_pipeline.stop()
+            pipeline.start(config)
+        except RuntimeError as e:
+            try:
+                old_pipeline.start(old_config)
+            except RuntimeError as restart_error:
+                # Nothing is running any more; forget the stopped pipeline so the
+                # collection thread exits instead of polling it
+                logger.warning("Failed to restart the previous pipeline of %s: %s", device_id, restart_error)
+                with self.lock:
+                    self._forget_pipeline(device_id)
+            raise RealSenseError(
+                status_code=500, detail=f"Failed to reconfigure streaming: {str(e)}"
+            )
+
+        with self.lock:
+            self.pipelines[device_id] = pipeline
+            self.configs[device_id] = config
+            self.stream_configs[device_id] = {
+                stream_config.stream_type: stream_config for stream_config in configs
+            }
+            self.active_streams[device_id] = active_streams
+            if not keep_align:
+                self.align_processors.pop(device_id, None)
+
+            frame_buffers = self.frame_buffers.get(device_id, {})
+            self.frame_buffers[device_id] = {
+                stream_type: frame_buffers.get(stream_type) or FrameDoubleBuffer()
+                for stream_type in active_streams
+            }
+            metadata_queues = self.metadata_queues.get(device_id, {})
+            self.metadata_queues[device_id] = {
+                stream_key: metadata_queues.get(stream_key, [])
+                for stream_key in active_streams
+            }
+
+        return StreamStatus(
+            device_id=device_id,
+            is_streaming=True,
+            active_streams=list(active_streams),
+        )
+
+    def _forget_pipeline(self, device_id: str):
+        """Drop a device's pipeline and stream state without stopping it; caller holds self.lock"""
+        self.pipelines.pop(device_id, None)
+        self.configs.pop(device_id, None)
+        self.stream_configs.pop(device_id, None)
+        self.active_streams.pop(device_id, None)
+        self.frame_buffers.pop(device_id, None)
+        self.metadata_queues.pop(device_id, None)
+        self.align_processors.pop(device_id, None)
+        if device_id in self.device_infos:
+            self.device_infos[device_id].is_streaming = False
+
     def activate_point_cloud(self, device_id: str, enable: bool) -> bool:
         """Activate or deactivate point cloud processing"""
         if device_id not in self.devices:
@@ -665,24 +828,37 @@ class RealSenseManager:
     ) -> np.ndarray:
         """Get the latest frame from a specific stream"""
         with self.lock:
-            if device_id not in self.frame_queues:
+            if device_id not in self.frame_buffers:
                 raise RealSenseError(
                     status_code=400, detail=f"Device {device_id} is not streaming"
                 )
 
-            if stream_type not in self.frame_queues[device_id]:
+            if stream_type not in self.frame_buffers[device_id]:
                 raise RealSenseError(
                     status_code=400, detail=f"Stream type {stream_type} is not active"
                 )
 
-            if not self.frame_queues[device_id][stream_type]:
+            frame = self.frame_buffers[device_id][stream_type].read()
+            if frame is None:
                 raise RealSenseError(
                     status_code=503,
                     detail=f"No frames available for stream {stream_type}",
                 )
+            return frame
+
+    def add_frame_listener(self, device_id: str, callback: Callable[[], None]):
+        """Register a callback invoked from the capture thread after each frameset"""
+        with self.lock:
+            self.frame_listeners.setdefault(device_id, []).append(callback)
 
-            # Return the most recent frame
-            return self.frame_queues[device_id][stream_type][-1]
+    def remove_frame_listener(self, device_id: str, callback: Callable[[], None]):
+        """Unregister a callback added with add_frame_listener"""
+        with self.lock:
+            listeners = self.frame_listeners.get(device_id)
+            if listeners and callback in listeners:
+                listeners.remove(callback)
+                if not listeners:
+                    del self.frame_listeners[device_id]
 
     def get_latest_metadata(self, device_id: str, stream_type: str) -> Dict:
         """Get the latest METADATA dictionary from a specific stream"""
@@ -739,20 +915,21 @@ class RealSenseManager:
             
             return latest_metadata
 
-    def _collect_frames(self, device_id: str, align_processor=None):
+    def _collect_frames(self, device_id: str):
         """Thread function to collect frames from the pipeline"""
         try:
             while device_id in self.pipelines:
                 try:
                     # Wait for a frameset
                     frames = self.pipelines[device_id].wait_for_frames()
-                    # Apply alignment if requested
-                    if align_processor:
-                        frames = align_processor.process(frames)
+                    # Apply alignment if requested; looked up per frameset since a stream swap can drop it
+                    align = self.align_processors.get(device_id)
+                    if align:
+                        frames = align[1].process(frames)
 
                     # Extract individual frames and add to queues
                     with self.lock:
-                        if device_id not in self.frame_queues:
+                        if device_id not in self.frame_buffers:
                             break
 
                         for stream_type in self.active_streams[device_id]:
@@ -774,7 +951,7 @@ class RealSenseManager:
                                 if stream_type == rs.stream.depth.name:
                                     frame_data = frames.get_depth_frame()
                                     frame = (
-                                        rs.colorizer().colorize(frame_data).get_data()
+                                        self.colorizer.colorize(frame_data).get_data()
                                     )  # assuming no throw if 'not frame'
                                     if self.is_pointcloud_enabled.get(device_id, False):
                                         points = self.pc.calculate(frame_data)
@@ -863,28 +1040,31 @@ class RealSenseManager:
                                             mask = verts[:, 2] >= 0.03
                                             verts = verts[mask]
                                     except Exception as filter_error:
-                                        print(f"❌ Error filtering vertices: {filter_error}")
+                                        logger.warning("❌ Error filtering vertices: %s", filter_error)
                                         # Keep original vertices if filtering fails
                                         pass
                                     # texcoords = np.asanyarray(t).view(np.float32).reshape(-1, 2)  # uv
                                     
                                     # Debug logging to see what we're storing
-                                    print(f"🔍 RS_MANAGER: Storing vertices type: {type(verts)}, shape: {verts.shape if hasattr(verts, 'shape') else 'no shape'}")
-                                    if safe_len(verts) > 0:
-                                        print(f"🔍 RS_MANAGER: First vertex: {verts[0]}, type: {type(verts[0])}")
+                                    if logger.isEnabledFor(logging.DEBUG):
+                                        logger.debug("🔍 RS_MANAGER: Storing vertices type: %s, shape: %s", type(verts), getattr(verts, "shape", "no shape"))
+                                        if safe_len(verts) > 0:
+                                            logger.debug("🔍 RS_MANAGER: First vertex: %s, type: %s", verts[0], type(verts[0]))
                                     
                                     metadata["point_cloud"] = {
                                         "vertices": verts,
                                         "texture_coordinates": [],
                                     }
 
-                                frame = np.asanyarray(frame)
+                                if not isinstance(frame, np.ndarray):
+                                    # get_data() is a view into librealsense memory; take
+                                    # the one copy the published frame needs
+                                    frame = np.array(frame)
 
-                                # Add to queue
-                                frame_queue = self.frame_queues[device_id][
+                                # Publish to the stream's double buffer
+                                self.frame_buffers[device_id][
                                     "-".join(stream_name_list)
-                                ]
-                                frame_queue.append(frame)
+                                ].publish(frame)
 
                                 metadata_queue = self.metadata_queues[device_id][
                                     "-".join(stream_name_list)
@@ -892,37 +1072,33 @@ class RealSenseManager:
                                 metadata_queue.append(metadata)
 
                                 # Keep queue size limited
-                                while len(frame_queue) > self.max_queue_size:
-                                    frame_queue.pop(0)
-
                                 while len(metadata_queue) > self.max_queue_size:
                                     metadata_queue.pop(0)
                             except RuntimeError:
                                 # Frame may not be available for this stream type
                                 pass
 
+                        listeners = list(self.frame_listeners.get(device_id, ()))
+
+                    # Notify outside the lock so listeners can fetch the new frames
+                    for listener in listeners:
+                        try:
+                            listener()
+                        except Exception as e:
+                            logger.warning("Frame listener error: %s", e)
+
                 except RuntimeError as e:
                     # Handle timeout or other error
-                    print(f"Error collecting frames: {str(e)}")
+                    logger.warning("Error collecting frames: %s", e)
                     time.sleep(0.1)
 
         except Exception as e:
-            print(f"Frame collection thread exception: {str(e)}")
+            logger.warning("Frame collection thread exception: %s", e)
             # Stop the pipeline if there's an error
             try:
                 with self.lock:
                     if device_id in self.pipelines:
                         self.pipelines[device_id].stop()
-                        del self.pipelines[device_id]
-                        if device_id in self.configs:
-                            del self.configs[device_id]
-                        if device_id in self.active_streams:
-                            del self.active_streams[device_id]
-                        if device_id in self.frame_queues:
-                            del self.frame_queues[device_id]
-                        if device_id in self.metadata_queues:
-                            del self.metadata_queues[device_id]
-                        if device_id in self.device_infos:
-                            self.device_infos[device_id].is_streaming = False
+                        self._forget_pipeline(device_id)
             except Exception:
                 pass
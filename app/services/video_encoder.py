@@ -0,0 +1,108 @@
+import fractions
+import logging
+from typing import Dict, Iterator, List, Optional
+
+import aiortc
+import av
+from aiortc import RTCRtpSender, rtcrtpsender
+from aiortc.codecs.h264 import MAX_FRAME_RATE, H264Encoder
+
+logger = logging.getLogger(__name__)
+
+# Low-latency, WebRTC-compatible (baseline profile) options per FFmpeg hardware encoder
+HW_ENCODER_OPTIONS: Dict[str, Dict[str, str]] = {
+    "h264_nvenc": {"preset": "p1", "tune": "ull", "zerolatency": "1", "profile": "baseline"},
+    "h264_v4l2m2m": {},
+}
+
+# Input pixel format per hardware encoder; PyAV converts each frame to it before encoding
+HW_ENCODER_PIX_FMTS: Dict[str, str] = {
+    "h264_nvenc": "yuv420p",
+    "h264_v4l2m2m": "nv12",
+}
+
+# aiortc (major, minor) releases checked to create sender encoders through rtcrtpsender.get_encoder,
+# with the H264Encoder internals HardwareH264Encoder overrides
+AIORTC_ENCODER_HOOK_VERSIONS = {(1, 11)}
+
+def hardware_encoder_available(codec_name: Optional[str]) -> bool:
+    """Check whether PyAV's FFmpeg build provides the named encoder."""
+    if not codec_name:
+        return False
+    try:
+        av.codec.Codec(codec_name, "w")
+        return True
+    except Exception:
+        return False
+
+def h264_codec_preferences() -> List:
+    """Video codec capabilities restricted to H.264 (plus RTX), for RTCRtpTransceiver.setCodecPreferences."""
+    return [
+        codec for codec in RTCRtpSender.getCapabilities("video").codecs
+        if codec.mimeType.lower() in ("video/h264", "video/rtx")
+    ]
+
+class HardwareH264Encoder(H264Encoder):
+    """aiortc H.264 encoder that encodes on a hardware encoder, falling back to libx264 if it can't open."""
+
+    def __init__(self, codec_name: str):
+        super().__init__()
+        self.codec_name = codec_name
+        self._hw_failed = False
+
+    def _create_codec(self, frame: av.VideoFrame) -> av.CodecContext:
+        codec = av.CodecContext.create(self.codec_name, "w")
+        codec.width = frame.width
+        codec.height = frame.height
+        codec.bit_rate = self.target_bitrate
+        codec.pix_fmt = HW_ENCODER_PIX_FMTS.get(self.codec_name, "yuv420p")
+        codec.framerate = fractions.Fraction(MAX_FRAME_RATE, 1)
+        codec.time_base = fractions.Fraction(1, MAX_FRAME_RATE)
+        codec.options = HW_ENCODER_OPTIONS.get(self.codec_name, {})
+        codec.open()
+        return codec
+
+    def _encode_frame(self, frame: av.VideoFrame, force_keyframe: bool) -> Iterator[bytes]:
+        # Same reset rule as H264Encoder, applied first so the codec is recreated here rather than as libx264
+        if self.codec and (
+            frame.width != self.codec.width
+            or frame.height != self.codec.height
+            or abs(self.target_bitrate - self.codec.bit_rate) / self.codec.bit_rate > 0.1
+        ):
+            self.buffer_data = b""
+            self.buffer_pts = None
+            self.codec = None
+
+        if self.codec is None and not self._hw_failed:
+            try:
+                self.codec = self._create_codec(frame)
+            except Exception as e:
+                logger.warning("Hardware encoder %s unavailable, using libx264: %s", self.codec_name, e)
+                self._hw_failed = True
+
+        yield from super()._encode_frame(frame, force_keyframe)
+
+def install_hardware_encoder(codec_name: str) -> bool:
+    """Make aiortc encode every H.264 video sender with HardwareH264Encoder(codec_name).
+
+    aiortc has no public hook for choosing encoders: RTCRtpSender creates them with the
+    get_encoder function it imports from aiortc.codecs, so that name is wrapped here. This
+    is the only place the app reaches into aiortc's internals, and it is skipped (returning
+    False, so video stays on libx264) on aiortc versions it hasn't been checked against.
+    """
+    version = tuple(int(part) for part in aiortc.__version__.split(".")[:2])
+    if version not in AIORTC_ENCODER_HOOK_VERSIONS or not hasattr(rtcrtpsender, "get_encoder"):
+        logger.warning("Hardware encoding is not supported with aiortc %s, using libx264", aiortc.__version__)
+        return False
+
+    # Wrap aiortc's own lookup even when called again, so encoders never nest
+    software_get_encoder = getattr(rtcrtpsender.get_encoder, "software_get_encoder", rtcrtpsender.get_encoder)
+
+    def get_encoder(codec):
+        if codec.mimeType.lower() == "video/h264":
+            return HardwareH264Encoder(codec_name)
+        return software_get_encoder(codec)
+
+    get_encoder.software_get_encoder = software_get_encoder
+    rtcrtpsender.get_encoder = get_encoder
+    return True
@@ -1,45 +1,141 @@
 import asyncio
+import logging
+import random
+import sys
 import uuid
-import weakref
 import threading
 import time
-from typing import Dict, List, Optional, Any, Tuple
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
 import numpy as np
 import cv2
-from aiortc import RTCPeerConnection, RTCSessionDescription, RTCIceCandidate, RTCConfiguration, RTCIceServer
-from aiortc.mediastreams import VideoStreamTrack
+import orjson
+from aiortc import RTCPeerConnection, RTCSessionDescription, RTCIceCandidate, RTCConfiguration, RTCIceServer, RTCRtpSender
+from aiortc.contrib.media import MediaRelay
+from aiortc.mediastreams import VIDEO_CLOCK_RATE, VIDEO_PTIME, VideoStreamTrack
 from av import VideoFrame
 from app.core.errors import RealSenseError
 from app.core.config import get_settings
-from app.models.webrtc import WebRTCSession, WebRTCStatus
-
-def safe_convert_vertices(vertices):
-    """Safely convert vertices to a Python list, handling NumPy arrays and other types."""
+from app.services.video_encoder import h264_codec_preferences, hardware_encoder_available, install_hardware_encoder
+from app.models.stream import StreamConfig, Resolution
+from app.models.webrtc import WebRTCSession, WebRTCStatus, ICECandidate
+
+logger = logging.getLogger(__name__)
+
+class WebRTCError(RealSenseError):
+    """Base class for WebRTC manager errors with a fixed HTTP status code."""
+    status_code = 400
+
+    def __init__(self, detail: str):
+        super().__init__(status_code=self.status_code, detail=detail)
+
+class SessionNotFoundError(WebRTCError):
+    """Raised when a session ID does not refer to an active session."""
+    status_code = 404
+
+class MaxSessionsError(WebRTCError):
+    """Raised when the concurrent session limit has been reached."""
+    status_code = 429
+
+class InvalidStreamTypeError(WebRTCError):
+    """Raised when an unknown stream type is requested."""
+    status_code = 400
+
+class StreamActivationError(WebRTCError):
+    """Raised when the device stream cannot be started or does not become active."""
+    status_code = 400
+
+def quantize_vertices(vertices: np.ndarray) -> Tuple[np.ndarray, float, List[float]]:
+    """Quantize float32 vertices (meters) to int16 around their bounding-box center.
+
+    Uses POINT_CLOUD_QUANTUM resolution unless the cloud is too large for int16 at that step,
+    in which case the step grows to fit. Clients recover coordinates as q / scale + offset.
+    Rows with a NaN or infinite coordinate are dropped, so the result can be shorter.
+    """
+    finite = np.isfinite(vertices).all(axis=1)
+    if not finite.all():
+        vertices = vertices[finite]
+    if vertices.shape[0] == 0:
+        return np.empty((0, 3), dtype=np.int16), 1.0 / POINT_CLOUD_QUANTUM, [0.0, 0.0, 0.0]
+
+    # Bounds in float64 so the extent of a far-flung float32 cloud can't overflow
+    low, high = vertices.min(axis=0).astype(np.float64), vertices.max(axis=0).astype(np.float64)
+    offset = (low + high) / 2
+    half_extent = float((high - low).max()) / 2
+    scale = min(1.0 / POINT_CLOUD_QUANTUM, 32767 / half_extent) if half_extent > 0 else 1.0 / POINT_CLOUD_QUANTUM
+    # Clipped so rounding at the extremes can never wrap around
+    quantized = np.clip(np.rint((vertices - offset) * scale), -32767, 32767).astype(np.int16)
+    return quantized, scale, offset.tolist()
+
+def select_point_cloud_vertices(vertices: np.ndarray, stride: int = 1) -> np.ndarray:
+    """Return the vertices of one point cloud update: the first POINT_CLOUD_MAX_VERTICES rows, every stride-th.
+
+    The cap is applied before the stride so decimation always shrinks the update.
+    """
+    return vertices[:POINT_CLOUD_MAX_VERTICES][::stride]
+
+def encode_point_cloud_message(header: Dict[str, Any], vertices: np.ndarray, scratch: Optional[bytearray] = None) -> bytes:
+    """Pack a point cloud data channel message.
+
+    Layout: a little-endian uint32 header length, the JSON header, then the vertices as
+    little-endian x, y, z triples of the array's dtype (readable in the browser as the
+    matching typed array, e.g. Int16Array).
+
+    With a scratch buffer the message is assembled in place and copied out once; the buffer
+    grows as needed and can be reused for the next message.
+    """
+    header_bytes = orjson.dumps(header)
+    # Pad the header so the vertex payload starts 4-byte aligned for the typed array
+    header_bytes += b" " * (-(4 + len(header_bytes)) % 4)
+    payload = np.ascontiguousarray(vertices.astype(vertices.dtype.newbyteorder("<"), copy=False))
+    if scratch is None:
+        return len(header_bytes).to_bytes(4, "little") + header_bytes + payload.tobytes()
+
+    payload_start = 4 + len(header_bytes)
+    size = payload_start + payload.nbytes
+    if len(scratch) < size:
+        scratch.extend(bytes(size - len(scratch)))
+    # aiortc keeps the sent object queued, so the scratch buffer itself can't be handed to send
+    with memoryview(scratch) as view:
+        view[:4] = len(header_bytes).to_bytes(4, "little")
+        view[4:payload_start] = header_bytes
+        view[payload_start:size] = memoryview(payload).cast("B")
+        return bytes(view[:size])
+
+def safe_convert_vertices(vertices, limit: Optional[int] = None):
+    """Safely convert vertices to a Python list, handling NumPy arrays and other types.
+
+    With `limit`, only the first `limit` vertices are converted.
+    """
     if vertices is None:
         return []
     
     # If it's already a list, return it
     if isinstance(vertices, list):
-        return vertices
+        return vertices if limit is None else vertices[:limit]
     
-    # If it's a NumPy array, convert to list
+    # If it's a NumPy array, convert to list (slicing first, so unused rows never become Python objects)
     if hasattr(vertices, 'tolist'):
         try:
+            if limit is not None:
+                vertices = vertices[:limit]
             return vertices.tolist()
         except Exception as e:
-            print(f"❌ Error converting NumPy array to list: {e}")
+            logger.warning("❌ Error converting NumPy array to list: %s", e)
             return []
     
     # If it's a string, it's corrupted data
     if isinstance(vertices, str):
-        print(f"❌ Vertices is a string (corrupted data), returning empty list")
+        logger.warning("❌ Vertices is a string (corrupted data), returning empty list")
         return []
     
     # Try to convert to list
     try:
-        return list(vertices)
+        vertices = list(vertices)
+        return vertices if limit is None else vertices[:limit]
     except Exception as e:
-        print(f"❌ Cannot convert vertices to list: {type(vertices)}, error: {e}")
+        logger.warning("❌ Cannot convert vertices to list: %s, error: %s", type(vertices), e)
         return []
 
 def safe_len(vertices):
@@ -47,12 +143,9 @@ def safe_len(vertices):
     if vertices is None:
         return 0
     
-    # Convert to list first if it's a NumPy array
-    if hasattr(vertices, 'tolist'):
-        try:
-            vertices = vertices.tolist()
-        except Exception:
-            return 0
+    # Arrays know their length; never materialize them as lists
+    if isinstance(vertices, np.ndarray):
+        return vertices.shape[0] if vertices.ndim else 0
     
     # Now it should be a list or similar
     try:
@@ -60,61 +153,444 @@ def safe_len(vertices):
     except Exception:
         return 0
 
+# Minimum seconds between repeated frame-error log lines from one track
+ERROR_LOG_INTERVAL = 5.0
+
+# Waiting for requested streams to become active: total budget, and the fallback recheck delay
+# (doubling up to the cap, with jitter) used when no frameset arrives to prompt a recheck
+STREAM_READY_TIMEOUT = 2.0
+STREAM_READY_RECHECK = 0.02
+STREAM_READY_RECHECK_MAX = 0.5
+
+# Stream types a WebRTC session can request
+_VALID_STREAM_TYPES = frozenset({"color", "depth", "infrared-1", "infrared-2", "pointcloud"})
+
+# Device stream format backing each WebRTC stream type
+_FORMAT_FOR_STREAM = {
+    "color": "rgb8",
+    "depth": "z16",
+    "infrared-1": "y8",
+    "infrared-2": "y8",
+    "pointcloud": "z16",
+}
+
+# Resolution of every stream the WebRTC manager starts, shared by all its stream configs
+DEFAULT_RESOLUTION = Resolution(width=640, height=480)
+
+# Seconds between background session cleanup passes
+SESSION_CLEANUP_INTERVAL = 60
+
+# Seconds the point cloud sender waits for create_offer to store its session
+SESSION_REGISTER_TIMEOUT = 5.0
+
+# Vertices sent per point cloud update over the data channel
+POINT_CLOUD_MAX_VERTICES = 3000
+
+# Binary point cloud messages are filled up to this size (the SCTP message size every peer accepts),
+# leaving room for the header; an update only splits into several messages beyond that
+POINT_CLOUD_MESSAGE_BYTES = 64 * 1024
+POINT_CLOUD_CHUNK_VERTICES = (POINT_CLOUD_MESSAGE_BYTES - 1024) // (3 * 2)
+
+# Seconds between point cloud updates sent over a session's data channel (~30 FPS)
+POINT_CLOUD_SEND_INTERVAL = 1 / 30
+
+# Log every point cloud update sent; off by default since it fires at the send rate even at DEBUG level
+DEBUG_POINT_CLOUD_SENDS = False
+
+# Coordinate step (meters) of the int16-quantized vertices sent over the data channel
+POINT_CLOUD_QUANTUM = 0.001
+
+# Data channel flow control: stop sending point cloud chunks above the high-water mark until the
+# buffer drains below the low-water mark; an update still blocked after the timeout is dropped
+DATA_CHANNEL_HIGH_WATER = 1024 * 1024
+DATA_CHANNEL_LOW_WATER = 256 * 1024
+DATA_CHANNEL_DRAIN_TIMEOUT = 2.0
+
+# Point cloud quality adaptation: above the decimate mark every POINT_CLOUD_DECIMATION-th vertex
+# is sent until the buffer falls back below the low-water mark; above the high-water mark the
+# update is skipped outright
+DATA_CHANNEL_DECIMATE_WATER = 512 * 1024
+POINT_CLOUD_DECIMATION = 4
+
+# Seconds a session's getStats() result is reused by get_session and get_all_sessions
+STATS_CACHE_TTL = 1.0
+
+# Fields reported per aiortc stats entry; anything an entry lacks is left out
+STAT_KEYS = (
+    "type", "id", "timestamp",
+    "bytesSent", "bytesReceived", "packetsSent", "packetsReceived",
+    "packetsLost", "jitter", "roundTripTime",
+)
+
+# How long recv waits for the frame broker to deliver a new frame before resending the last one
+FRAME_WAIT_TIMEOUT = 0.1
+
+# Frames between samples of a track's last-frame clock
+FRAME_TIME_SAMPLE_INTERVAL = 30
+
+# Frames queued per track; when a track falls behind the oldest queued frame is dropped
+FRAME_QUEUE_SIZE = 2
+
+# VideoFrames each track cycles through. A shared track's frames go through MediaRelay to every
+# session's sender, which may still be encoding one in an executor thread when the ring comes
+# back round, so a slot is only rewritten while nothing outside the ring references its frame;
+# otherwise a new frame replaces it and the old one is left to whoever still holds it
+FRAME_RING_SIZE = 3
+
+# Bytes per pixel of the formats tracks write directly into reused frame planes
+_AV_FORMAT_BYTES = {"rgb24": 3, "gray": 1}
+
+# Shared read-only source for the black frames tracks send while no camera frame is available
+_BLACK_RGB = np.zeros((480, 640, 3), dtype=np.uint8)
+_BLACK_RGB.setflags(write=False)
+
+# Raw depth values (millimetres) spread across the full colormap when colorizing z16 frames
+DEPTH_COLORMAP_RANGE = 10_000
+
+# PyAV pixel format of the frames each stream delivers (depth arrives colorized as RGB)
+STREAM_AV_FORMATS = {
+    "color": "rgb24",
+    "depth": "rgb24",
+    "infrared": "gray",
+}
+
+def _project_stats(stats_dict) -> Dict[str, Dict[str, Any]]:
+    """Reduce an aiortc stats report to the STAT_KEYS fields of each entry."""
+    return {
+        key: {field: getattr(entry, field) for field in STAT_KEYS if hasattr(entry, field)}
+        for key, entry in stats_dict.items()
+    }
+
+def _with_backing_streams(stream_types: Iterable[str]) -> List[str]:
+    """Expand stream types with the device streams they depend on (pointcloud needs depth)."""
+    return [
+        counted for stream_type in stream_types
+        for counted in ((stream_type, "depth") if stream_type == "pointcloud" else (stream_type,))
+    ]
+
+def _av_format_for(stream_type: str) -> str:
+    """Return the PyAV pixel format a stream type's frames are expected in."""
+    return STREAM_AV_FORMATS.get(stream_type.split("-")[0], "rgb24")
+
+def _matches_av_format(frame_data: np.ndarray, av_format: str) -> bool:
+    """Check whether a frame can be handed to PyAV as-is in the given format."""
+    if frame_data.dtype != np.uint8:
+        return False
+    if av_format == "gray":
+        return frame_data.ndim == 2
+    return frame_data.ndim == 3 and frame_data.shape[2] == 3
+
+class _ErrorLogLimiter:
+    """Logs a warning at most once per ERROR_LOG_INTERVAL, counting the ones suppressed in between."""
+
+    __slots__ = ("_last", "_suppressed")
+
+    def __init__(self):
+        self._last = float("-inf")
+        self._suppressed = 0
+
+    def warning(self, msg: str, *args):
+        now = time.monotonic()
+        if now - self._last < ERROR_LOG_INTERVAL:
+            self._suppressed += 1
+            return
+        if self._suppressed:
+            msg += " (%s similar errors suppressed)"
+            args += (self._suppressed,)
+        logger.warning(msg, *args)
+        self._last = now
+        self._suppressed = 0
+
+@lru_cache(maxsize=1)
+def _depth_colormap_lut() -> np.ndarray:
+    """Build the z16 -> RGB JET lookup table (65536 x 3), black for missing depth."""
+    jet = cv2.applyColorMap(np.arange(256, dtype=np.uint8).reshape(-1, 1), cv2.COLORMAP_JET)
+    jet = jet.reshape(256, 3)[:, ::-1]  # BGR -> RGB
+    index = np.minimum(np.arange(65536, dtype=np.uint32) * 256 // DEPTH_COLORMAP_RANGE, 255)
+    lut = np.ascontiguousarray(jet[index])
+    lut[0] = 0
+    return lut
+
+class FrameBroker:
+    """Fans camera frames out from each device's capture thread to the tracks streaming them.
+
+    A single listener per device fetches every subscribed stream's frame once per frameset
+    and hands the same snapshot to all subscriber queues, so N viewers of a stream don't
+    cost N librealsense buffer reads.
+    """
+
+    def __init__(self, realsense_manager):
+        self.realsense_manager = realsense_manager
+        self._subscribers: Dict[str, Dict[str, List[asyncio.Queue]]] = {}  # device_id -> stream_type -> queues
+        self._listeners: Dict[str, Callable[[], None]] = {}  # device_id -> capture thread listener
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Subscriptions change on the event loop but are read from the capture threads
+        self._lock = threading.Lock()
+
+    def subscribe(self, device_id: str, stream_type: str) -> asyncio.Queue:
+        """Return a queue that receives each new frame of the stream."""
+        self._loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=FRAME_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.setdefault(device_id, {}).setdefault(stream_type, []).append(queue)
+        if device_id not in self._listeners:
+            listener = lambda: self._on_frameset(device_id)
+            self._listeners[device_id] = listener
+            self.realsense_manager.add_frame_listener(device_id, listener)
+        return queue
+
+    def unsubscribe(self, device_id: str, stream_type: str, queue: asyncio.Queue):
+        """Stop delivering frames to a queue returned by subscribe."""
+        with self._lock:
+            streams = self._subscribers.get(device_id, {})
+            queues = streams.get(stream_type)
+            if queues and queue in queues:
+                queues.remove(queue)
+                if not queues:
+                    del streams[stream_type]
+            device_in_use = bool(streams)
+            if not device_in_use:
+                self._subscribers.pop(device_id, None)
+        if not device_in_use:
+            listener = self._listeners.pop(device_id, None)
+            if listener is not None:
+                self.realsense_manager.remove_frame_listener(device_id, listener)
+
+    def _on_frameset(self, device_id: str):
+        """Runs on the device's capture thread after each frameset."""
+        with self._lock:
+            stream_types = list(self._subscribers.get(device_id, ()))
+        for stream_type in stream_types:
+            try:
+                frame = self.realsense_manager.get_latest_frame(device_id, stream_type)
+            except Exception:
+                # Stream not active (yet); subscribers time out and report it
+                continue
+            # Published frames are never modified, so every subscriber can share this one
+            self._loop.call_soon_threadsafe(self._publish, device_id, stream_type, frame)
+
+    def _publish(self, device_id: str, stream_type: str, frame: np.ndarray):
+        for queue in list(self._subscribers.get(device_id, {}).get(stream_type, ())):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(frame)
+
 class RealSenseVideoTrack(VideoStreamTrack):
     """Video track that captures frames from RealSense camera."""
 
-    def __init__(self, realsense_manager, device_id, stream_type, session_id=None):
+    # Attributes touched on every recv; aiortc's base classes still provide a __dict__ for their own state
+    __slots__ = (
+        "realsense_manager", "device_id", "stream_type", "session_id",
+        "_start", "_frame_count", "_last_frame_time", "_av_format",
+        "_black_frame", "_error_log",
+        "_frame_broker", "_queue", "_queue_stream_type", "_last_frame_data",
+        "dropped_frames", "_frame_ring", "_ring_index", "_layout", "_conversion",
+    )
+
+    def __init__(self, realsense_manager, device_id, stream_type, session_id=None, frame_broker: Optional[FrameBroker] = None):
         super().__init__()
         self.realsense_manager = realsense_manager
         self.device_id = device_id
         self.stream_type = stream_type
         self.session_id = session_id
-        self._start = time.time()
+        # _start is left to aiortc's next_timestamp, which sets it from time.time() on the first frame
         self._frame_count = 0
-        self._last_frame_time = time.time()
+        self._last_frame_time = time.monotonic()
+        self._frame_broker = frame_broker or FrameBroker(realsense_manager)
+        self._queue: Optional[asyncio.Queue] = None
+        self._queue_stream_type: Optional[str] = None
+        self._last_frame_data: Optional[np.ndarray] = None
+        self._av_format = _av_format_for(stream_type)
+        self._black_frame = VideoFrame.from_ndarray(_BLACK_RGB, format="rgb24")
+        self._error_log = _ErrorLogLimiter()
+        self.dropped_frames = 0  # frame slots skipped because the consumer fell behind
+        # Reused output frames, each paired with a writable (height, width[, channels]) view of its pixels
+        # and the frame's reference count while only the ring holds it
+        self._frame_ring: List[Optional[Tuple[VideoFrame, np.ndarray, int]]] = [None] * FRAME_RING_SIZE
+        self._ring_index = 0
+        # Conversion chosen for the last frame layout seen: (shape, dtype, av_format) -> (writer, format)
+        self._layout = None
+        self._conversion = (np.copyto, self._av_format)
 
     def switch_stream_type(self, new_stream_type: str):
         """Switch the stream type for this video track."""
-        print(f"🔄 Switching video track from {self.stream_type} to {new_stream_type}")
+        logger.info("🔄 Switching video track from %s to %s", self.stream_type, new_stream_type)
         self.stream_type = new_stream_type
+        self._av_format = _av_format_for(new_stream_type)
+
+    @staticmethod
+    def _colorize_depth(out: np.ndarray, frame_data: np.ndarray):
+        # Raw z16 depth; colorize with a single LUT gather straight into the frame
+        np.take(_depth_colormap_lut(), frame_data, axis=0, out=out, mode="clip")
+
+    def _conversion_for(self, frame_data: np.ndarray) -> Tuple[Callable[[np.ndarray, np.ndarray], None], str]:
+        """Pick how frames laid out like this one are written into a libav frame.
+
+        Returns a writer called as write(out, frame_data), like np.copyto, and the pixel format.
+        """
+        if _matches_av_format(frame_data, self._av_format):
+            return np.copyto, self._av_format
+        if frame_data.ndim == 2:
+            if frame_data.dtype == np.uint16:
+                return self._colorize_depth, "rgb24"
+            return lambda out, frame: np.copyto(out, frame, casting="unsafe"), "gray"
+        if frame_data.shape[2] == 1:
+            return lambda out, frame: np.copyto(out, frame[:, :, 0]), "gray"
+        if frame_data.shape[2] == 4:
+            return lambda out, frame: np.copyto(out, frame[:, :, :3]), "rgb24"
+        return np.copyto, "rgb24"
+
+    @staticmethod
+    def _new_frame(height: int, width: int, av_format: str) -> Tuple[VideoFrame, np.ndarray]:
+        """Allocate a VideoFrame and a writable view of its pixels, honouring the plane's line size."""
+        frame = VideoFrame(width, height, av_format)
+        plane = frame.planes[0]
+        bytes_per_pixel = _AV_FORMAT_BYTES[av_format]
+        if bytes_per_pixel == 1:
+            view = np.ndarray((height, width), dtype=np.uint8, buffer=plane, strides=(plane.line_size, 1))
+        else:
+            view = np.ndarray(
+                (height, width, bytes_per_pixel), dtype=np.uint8, buffer=plane,
+                strides=(plane.line_size, bytes_per_pixel, 1),
+            )
+        return frame, view
+
+    def _next_frame(self, height: int, width: int, av_format: str) -> Tuple[VideoFrame, np.ndarray]:
+        """Return the next reused VideoFrame and a writable view of its pixels.
+
+        A slot whose frame is still referenced outside the ring (by a relay or an encoder) is
+        replaced rather than rewritten.
+        """
+        slot = self._frame_ring[self._ring_index]
+        if (
+            slot is None
+            or (slot[0].width, slot[0].height, slot[0].format.name) != (width, height, av_format)
+            or sys.getrefcount(slot[0]) > slot[2]
+        ):
+            frame_and_view = self._new_frame(height, width, av_format)
+            # Measured while one tuple holds the frame, as the ring's slot will
+            idle_refs = sys.getrefcount(frame_and_view[0])
+            slot = (*frame_and_view, idle_refs)
+            self._frame_ring[self._ring_index] = slot
+        self._ring_index = (self._ring_index + 1) % FRAME_RING_SIZE
+        return slot[0], slot[1]
+
+    def _frame_queue(self) -> asyncio.Queue:
+        """Return the broker queue for the current stream type, resubscribing after a switch."""
+        if self._queue_stream_type != self.stream_type:
+            self._unsubscribe()
+            self._queue = self._frame_broker.subscribe(self.device_id, self.stream_type)
+            self._queue_stream_type = self.stream_type
+            self._last_frame_data = None
+        return self._queue
+
+    def _unsubscribe(self):
+        if self._queue is not None:
+            self._frame_broker.unsubscribe(self.device_id, self._queue_stream_type, self._queue)
+            self._queue = None
+            self._queue_stream_type = None
+
+    def stop(self):
+        self._unsubscribe()
+        super().stop()
+
+    def _skip_missed_frames(self, pts: int) -> int:
+        """Jump the clock past frame slots the consumer has already missed.
+
+        When the encoder falls behind, next_timestamp() returns immediately for every
+        overdue slot; skipping them avoids building frames that would only be late.
+        """
+        behind = time.time() - (self._start + pts / VIDEO_CLOCK_RATE)
+        if behind <= VIDEO_PTIME:
+            return pts
+        skipped = int(behind / VIDEO_PTIME)
+        self._timestamp += skipped * int(VIDEO_PTIME * VIDEO_CLOCK_RATE)
+        self.dropped_frames += skipped
+        return self._timestamp
 
     async def recv(self):
+        # Pace first, so a late consumer can drop slots before any frame work is done
+        pts, time_base = await self.next_timestamp()
+        pts = self._skip_missed_frames(pts)
+
         try:
-            # Get frame from RealSense
-            frame_data = self.realsense_manager.get_latest_frame(self.device_id, self.stream_type)
+            # Wait for the broker to deliver a fresh frame; resend the last one if none arrives in time
+            try:
+                frame_data = await asyncio.wait_for(self._frame_queue().get(), FRAME_WAIT_TIMEOUT)
+                self._last_frame_data = frame_data
+            except asyncio.TimeoutError:
+                frame_data = self._last_frame_data
+                if frame_data is None:
+                    raise RealSenseError(
+                        status_code=503, detail=f"No frames available for stream {self.stream_type}"
+                    )
 
-            # Convert to RGB format if necessary
-            if len(frame_data.shape) == 3 and frame_data.shape[2] == 3:
-                # Already RGB, no conversion needed
-                img = frame_data
-            else:
-                # Convert to RGB
-                img = cv2.cvtColor(frame_data, cv2.COLOR_BGR2RGB)
-            
-            # Create VideoFrame
-            video_frame = VideoFrame.from_ndarray(img, format="rgb24")
+            # Write the sensor buffer straight into the next reused VideoFrame, converting on the way
+            # only if needed; the conversion is chosen once per frame layout, not on every frame
+            layout = (frame_data.shape, frame_data.dtype, self._av_format)
+            if layout != self._layout:
+                self._layout = layout
+                self._conversion = self._conversion_for(frame_data)
+            write, av_format = self._conversion
+            video_frame, pixels = self._next_frame(frame_data.shape[0], frame_data.shape[1], av_format)
+            write(pixels, frame_data)
 
             # Set frame timestamp
-            pts, time_base = await self.next_timestamp()
             video_frame.pts = pts
             video_frame.time_base = time_base
 
-            # Update frame statistics
+            # Update frame statistics; the clock is only sampled every few frames
             self._frame_count += 1
-            self._last_frame_time = time.time()
+            if self._frame_count % FRAME_TIME_SAMPLE_INTERVAL == 0:
+                self._last_frame_time = time.monotonic()
 
             return video_frame
         except Exception as e:
-            # On error, return a black frame
-            width, height = 640, 480  # Default size
-            img = np.zeros((height, width, 3), dtype=np.uint8)
-            video_frame = VideoFrame.from_ndarray(img, format="rgb24")
-            pts, time_base = await self.next_timestamp()
-            video_frame.pts = pts
-            video_frame.time_base = time_base
-
-            print(f"Error getting frame for session {self.session_id}: {str(e)}")
-            return video_frame
+            # On error, return the cached black frame
+            self._black_frame.pts = pts
+            self._black_frame.time_base = time_base
+
+            # Log at most once per interval so a disconnected camera doesn't flood the log
+            self._error_log.warning("Error getting %s frame from device %s: %s", self.stream_type, self.device_id, e)
+            return self._black_frame
+
+# Point cloud overlay text style, bound once instead of rebuilt on every draw
+_put_text = cv2.putText
+_OVERLAY_FONT = cv2.FONT_HERSHEY_SIMPLEX
+_OVERLAY_WHITE = (255, 255, 255)
+_OVERLAY_YELLOW = (0, 255, 255)
+_VERTEX_COUNT_ORIGIN = (20, 50)
+
+@lru_cache(maxsize=1)
+def _point_cloud_overlay() -> np.ndarray:
+    """Render the static parts of the point cloud placeholder frame once."""
+    width, height = 640, 480
+    img = np.zeros((height, width, 3), dtype=np.uint8)
+    
+    # Add text overlay with point cloud information (line 0, the vertex count, is drawn per frame)
+    text_lines = [
+        "3D Interactive View Available",
+        "Use mouse to rotate/zoom",
+        "Loading 3D data..."
+    ]
+    
+    y_offset = 50
+    for i, line in enumerate(text_lines, start=1):
+        y = y_offset + i * 30
+        # Add text with white color
+        _put_text(img, line, (20, y), _OVERLAY_FONT, 0.7, _OVERLAY_WHITE, 2)
+    
+    # Add a simple 3D-like visualization (placeholder)
+    # This will be replaced by the actual 3D rendering in the browser
+    center_x, center_y = width // 2, height // 2
+    radius = 100
+    
+    # Draw a circle to indicate 3D content
+    cv2.circle(img, (center_x, center_y), radius, _OVERLAY_YELLOW, 3)
+    _put_text(img, "3D", (center_x - 20, center_y + 10), _OVERLAY_FONT, 1, _OVERLAY_YELLOW, 2)
+    
+    img.setflags(write=False)
+    return img
 
 class PointCloudVideoTrack(VideoStreamTrack):
     """Video track that sends point cloud data for 3D rendering."""
@@ -125,9 +601,25 @@ class PointCloudVideoTrack(VideoStreamTrack):
         self.device_id = device_id
         self.stream_type = stream_type
         self.session_id = session_id
-        self._start = time.time()
         self._frame_count = 0
-        self._last_frame_time = time.time()
+        self._last_frame_time = time.monotonic()
+        self._black_frame = VideoFrame.from_ndarray(_BLACK_RGB, format="rgb24")
+        self._error_log = _ErrorLogLimiter()
+        self._overlay_buf: Optional[np.ndarray] = None  # scratch frame for _create_point_cloud_visualization
+        self._rgb_buf: Optional[np.ndarray] = None  # allocated on the first frame that needs conversion
+
+    def _to_rgb(self, img: np.ndarray) -> np.ndarray:
+        """Convert a non-RGB frame into the reused RGB buffer."""
+        height, width = img.shape[:2]
+        if self._rgb_buf is None or self._rgb_buf.shape[:2] != (height, width):
+            self._rgb_buf = np.empty((height, width, 3), dtype=np.uint8)
+        if img.ndim == 2 and img.dtype == np.uint16:
+            np.take(_depth_colormap_lut(), img, axis=0, out=self._rgb_buf)
+        elif img.ndim == 2:
+            cv2.cvtColor(img, cv2.COLOR_GRAY2RGB, dst=self._rgb_buf)
+        else:
+            cv2.cvtColor(img, cv2.COLOR_RGBA2RGB, dst=self._rgb_buf)
+        return self._rgb_buf
 
     async def recv(self):
         try:
@@ -165,8 +657,8 @@ class PointCloudVideoTrack(VideoStreamTrack):
                 # Already RGB, no conversion needed
                 pass
             else:
-                # Convert to RGB
-                img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+                # Convert to RGB into the reused buffer
+                img = self._to_rgb(img)
             
             # Create VideoFrame
             video_frame = VideoFrame.from_ndarray(img, format="rgb24")
@@ -176,73 +668,89 @@ class PointCloudVideoTrack(VideoStreamTrack):
             video_frame.pts = pts
             video_frame.time_base = time_base
 
-            # Update frame statistics
+            # Update frame statistics; the clock is only sampled every few frames
             self._frame_count += 1
-            self._last_frame_time = time.time()
+            if self._frame_count % FRAME_TIME_SAMPLE_INTERVAL == 0:
+                self._last_frame_time = time.monotonic()
 
             return video_frame
         except Exception as e:
-            # On error, return a black frame
-            width, height = 640, 480  # Default size
-            img = np.zeros((height, width, 3), dtype=np.uint8)
-            video_frame = VideoFrame.from_ndarray(img, format="rgb24")
+            # On error, return the cached black frame
             pts, time_base = await self.next_timestamp()
-            video_frame.pts = pts
-            video_frame.time_base = time_base
+            self._black_frame.pts = pts
+            self._black_frame.time_base = time_base
 
-            print(f"Error getting point cloud frame for session {self.session_id}: {str(e)}")
-            return video_frame
+            # Log at most once per interval so a disconnected camera doesn't flood the log
+            self._error_log.warning("Error getting point cloud frame from device %s: %s", self.device_id, e)
+            return self._black_frame
 
     def _create_point_cloud_visualization(self, vertices):
         """Create a visualization frame that encodes point cloud data for 3D rendering."""
-        # Safely convert vertices to list
-        vertices = safe_convert_vertices(vertices)
-        
-        if safe_len(vertices) == 0:
+        vertex_count = safe_len(vertices)
+        if vertex_count == 0:
             # Return black image if no vertices
-            return np.zeros((480, 640, 3), dtype=np.uint8)
+            return _BLACK_RGB
         
-        # Create a visualization that shows point cloud info
-        width, height = 640, 480
-        img = np.zeros((height, width, 3), dtype=np.uint8)
-        
-        # Add text overlay with point cloud information
-        text_lines = [
-            f"Point Cloud: {safe_len(vertices)} vertices",
-            "3D Interactive View Available",
-            "Use mouse to rotate/zoom",
-            "Loading 3D data..."
-        ]
-        
-        y_offset = 50
-        for i, line in enumerate(text_lines):
-            y = y_offset + i * 30
-            # Add text with white color
-            cv2.putText(img, line, (20, y), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-        
-        # Add a simple 3D-like visualization (placeholder)
-        # This will be replaced by the actual 3D rendering in the browser
-        center_x, center_y = width // 2, height // 2
-        radius = 100
-        
-        # Draw a circle to indicate 3D content
-        cv2.circle(img, (center_x, center_y), radius, (0, 255, 255), 3)
-        cv2.putText(img, "3D", (center_x - 20, center_y + 10), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 255), 2)
+        # Start from the pre-rendered static overlay; only the vertex count line changes per frame
+        if self._overlay_buf is None:
+            self._overlay_buf = np.empty_like(_point_cloud_overlay())
+        img = self._overlay_buf
+        np.copyto(img, _point_cloud_overlay())
+        _put_text(img, f"Point Cloud: {vertex_count} vertices", _VERTEX_COUNT_ORIGIN, _OVERLAY_FONT, 0.7, _OVERLAY_WHITE, 2)
         
         return img
 
 class WebRTCManager:
     def __init__(self, realsense_manager):
         self.realsense_manager = realsense_manager
+        # Session map is read without locking; each session carries its own lock for mutation
         self.sessions: Dict[str, Dict[str, Any]] = {}
-        self.lock = asyncio.Lock()
         self.settings = get_settings()
         self.max_concurrent_sessions = 10  # Limit concurrent sessions
+        self._active_session_count = 0  # Sessions marked connected; kept in step by _set_connected
         self.session_timeout = 3600  # 1 hour timeout
         
         # Stream reference counting for independent browser management
-        self.stream_references: Dict[str, Dict[str, int]] = {}  # device_id -> stream_type -> ref_count
-        self.device_stream_configs: Dict[str, Dict[str, Any]] = {}  # device_id -> stream_config
+        self.stream_references: Dict[str, Counter] = {}  # device_id -> stream_type -> ref_count
+        self._stream_config_cache: Dict[Tuple[str, str], StreamConfig] = {}  # (device_id, stream_type) -> config
+
+        # What is actually running on each device, updated by _apply_stream_change under the device's lock.
+        # Locks are per device, so reconfiguring one camera never waits on another.
+        self._device_locks: Dict[str, asyncio.Lock] = {}
+        self._applied_streams: Dict[str, Set[str]] = {}  # device_id -> running stream types
+        self._applied_pointcloud: Dict[str, bool] = {}  # device_id -> point cloud processing enabled
+        self.device_stream_configs: Dict[str, Dict[str, Any]] = {}  # device_id -> {"by_type": {stream_type: StreamConfig}, "started_at"}
+        # Bumped on every reference change; keys the serialized get_stream_reference_info_json body
+        self._references_version = 0
+        self._references_json: Tuple[int, bytes] = (-1, b"")
+
+        # Shares each device's frames between all video tracks streaming it
+        self.frame_broker = FrameBroker(realsense_manager)
+
+        # One source track per (device_id, stream_type), fanned out to every session through the relay
+        self._relay = MediaRelay()
+        self._shared_tracks: Dict[Tuple[str, str], VideoStreamTrack] = {}
+        self._shared_track_refs: Dict[Tuple[str, str], int] = {}
+
+        # Encoded point cloud responses, reused while the frame number is unchanged
+        self.pointcloud_cache: Dict[str, Tuple[int, bytes]] = {}  # device_id -> (frame_number, body)
+        self.pointcloud_inflight: Dict[str, Tuple[int, asyncio.Future]] = {}  # device_id -> (frame_number, pending body)
+
+        # Peer connection stats per session, refreshed at most once per STATS_CACHE_TTL
+        self.stats_cache: Dict[str, Tuple[float, Optional[Dict[str, Any]]]] = {}  # session_id -> (fetched_at, stats)
+
+        # Single long-lived cleanup task, managed by start()/stop()
+        self._cleanup_task: Optional[asyncio.Task] = None
+        self._shutdown = asyncio.Event()
+
+        # Optional hardware H.264 encoder for outgoing video
+        self.hw_encoder: Optional[str] = None
+        if self.settings.VIDEO_HW_ENCODER:
+            if hardware_encoder_available(self.settings.VIDEO_HW_ENCODER):
+                if install_hardware_encoder(self.settings.VIDEO_HW_ENCODER):
+                    self.hw_encoder = self.settings.VIDEO_HW_ENCODER
+            else:
+                logger.warning("Video encoder %s not available in this FFmpeg build, using software encoding", self.settings.VIDEO_HW_ENCODER)
 
         # Set up ICE servers for WebRTC
         self.ice_servers = []
@@ -259,398 +767,304 @@ class WebRTCManager:
                 )
             )
 
+    def _make_stream_config(self, device_id: str, stream_type: str) -> StreamConfig:
+        """Return the device stream configuration backing a WebRTC stream type.
+
+        Configs are built once per device and stream type and shared afterwards; they are never mutated.
+        """
+        if stream_type == "pointcloud":
+            # For pointcloud, we only need the depth stream
+            stream_type = "depth"
+        key = (device_id, stream_type)
+        config = self._stream_config_cache.get(key)
+        if config is None:
+            config = StreamConfig(
+                sensor_id=f"{device_id}-sensor-0",
+                stream_type=stream_type,
+                format=_FORMAT_FOR_STREAM.get(stream_type, "rgb8"),
+                resolution=DEFAULT_RESOLUTION,
+                framerate=30
+            )
+            self._stream_config_cache[key] = config
+        return config
+
+    def _reconfigure_device_stream(
+        self,
+        device_id: str,
+        configs: List[StreamConfig],
+        added: Optional[List[StreamConfig]] = None,
+        removed: Optional[Set[str]] = None,
+    ):
+        """Add or remove streams on a running device, keeping frames flowing to existing viewers.
+
+        Falls back to a full stop/start with `configs` if the manager can't update streams
+        in place or the incremental update fails.
+        """
+        if not hasattr(self.realsense_manager, "update_streams"):
+            self.realsense_manager.stop_stream(device_id)
+            self.realsense_manager.start_stream(device_id, configs)
+            return
+        try:
+            # One pipeline swap for the whole change, skipped if the streams are already running
+            self.realsense_manager.update_streams(device_id, added=added, removed=sorted(removed or ()))
+        except Exception as e:
+            logger.warning("Incremental stream update failed for %s, restarting device stream: %s", device_id, e)
+            self.realsense_manager.stop_stream(device_id)
+            self.realsense_manager.start_stream(device_id, configs)
+
+    def _plan_stream_change(self, device_id: str, add: Iterable[str] = (), remove: Iterable[str] = ()) -> bool:
+        """Update reference counts and the planned device configuration in one pass.
+
+        Pure bookkeeping with no awaits, so it runs atomically on the event loop without a
+        lock. Returns True if the device's running streams need to be brought in line with
+        the plan by _apply_stream_change.
+        """
+        add, remove = tuple(add), tuple(remove)
+        self._references_version += 1
+        references = self.stream_references.setdefault(device_id, Counter())
+        # For pointcloud, count both pointcloud and the depth stream backing it
+        references.update(_with_backing_streams(add))
+        references.subtract(_with_backing_streams(remove))
+        # Clean up zero (and never-referenced) counts in one pass
+        references += Counter()
+
+        # Every referenced stream type except pointcloud maps to a device stream; only the
+        # touched types can have changed, so edit the planned mapping in place
+        planned = self.device_stream_configs.setdefault(device_id, {"by_type": {}, "started_at": time.time()})
+        by_type = planned["by_type"]
+        changed = False
+        for stream_type in {*add, *remove, "depth"}:
+            if stream_type == "pointcloud":
+                continue
+            if stream_type in references and stream_type not in by_type:
+                by_type[stream_type] = self._make_stream_config(device_id, stream_type)
+                changed = True
+            elif stream_type not in references and by_type.pop(stream_type, None) is not None:
+                changed = True
+
+        if not references:
+            del self.stream_references[device_id]
+        if not by_type:
+            del self.device_stream_configs[device_id]
+        if not changed:
+            return self._applied_pointcloud.get(device_id, False) != ("pointcloud" in references)
+        planned["started_at"] = time.time()
+        return True
+
+    async def _apply_stream_change(self, device_id: str):
+        """Bring the device's running streams in line with the planned configuration.
+
+        Blocking librealsense calls run in a worker thread. Only the device's own lock is
+        held, so changes to different devices proceed concurrently; each apply reconciles
+        to the latest plan, so overlapping changes to one device converge on the final
+        configuration.
+        """
+        async with self._device_locks.setdefault(device_id, asyncio.Lock()):
+            planned = self.device_stream_configs.get(device_id)
+            by_type = dict(planned["by_type"]) if planned else {}
+            configs = list(by_type.values())
+            applied = self._applied_streams.get(device_id, set())
+
+            if not configs:
+                if applied:
+                    # No more stream types, stop device stream
+                    await asyncio.to_thread(self.realsense_manager.stop_stream, device_id)
+                    logger.info("Stopped device stream for %s - no more active stream types", device_id)
+                self._applied_streams.pop(device_id, None)
+                self._applied_pointcloud.pop(device_id, None)
+                return
+
+            if not applied:
+                # First time starting device stream
+                logger.info("Starting device stream for %s with %s stream types", device_id, len(configs))
+                await asyncio.to_thread(self.realsense_manager.start_stream, device_id, configs)
+                self._applied_streams[device_id] = set(by_type)
+                logger.info("Started device stream for %s with %s stream types", device_id, len(configs))
+            else:
+                added = [config for stream_type, config in by_type.items() if stream_type not in applied]
+                removed = applied - by_type.keys()
+                if added or removed:
+                    await asyncio.to_thread(self._reconfigure_device_stream, device_id, configs, added, removed)
+                    self._applied_streams[device_id] = set(by_type)
+                    logger.info("Updated device stream for %s - removed %s, now has %s stream types", device_id, removed, len(configs))
+
+            # Enable point cloud processing only while a pointcloud stream is requested
+            pointcloud = "pointcloud" in self.stream_references.get(device_id, {})
+            if self._applied_pointcloud.get(device_id, False) != pointcloud:
+                self.realsense_manager.activate_point_cloud(device_id, pointcloud)
+                self._applied_pointcloud[device_id] = pointcloud
+
     async def _ensure_device_stream(self, device_id: str, stream_types: List[str]) -> bool:
         """Ensure device stream is running for the requested stream types."""
-        async with self.lock:
-            # Initialize reference counting for this device if not exists
-            if device_id not in self.stream_references:
-                self.stream_references[device_id] = {}
-            
-            # Check if we need to start the device stream
-            need_to_start_stream = False
-            new_stream_configs = []
-            
-            # Validate stream types before processing
-            valid_stream_types = ["color", "depth", "infrared-1", "infrared-2", "pointcloud"]
-            for stream_type in stream_types:
-                if stream_type not in valid_stream_types:
-                    raise RealSenseError(
-                        status_code=400, 
-                        detail=f"Invalid stream type: {stream_type}. Valid types are: {', '.join(valid_stream_types)}"
-                    )
-            
-            for stream_type in stream_types:
-                if stream_type not in self.stream_references[device_id]:
-                    self.stream_references[device_id][stream_type] = 0
-                    need_to_start_stream = True
-                    
-                    # Create stream config
-                    if stream_type == "pointcloud":
-                        # For pointcloud, we only need the depth stream
-                        stream_config = {
-                            "sensor_id": f"{device_id}-sensor-0",
-                            "stream_type": "depth",  # Use depth stream for pointcloud
-                            "format": "z16",
-                            "resolution": {"width": 640, "height": 480},
-                            "framerate": 30
-                        }
-                    else:
-                        stream_config = {
-                            "sensor_id": f"{device_id}-sensor-0",
-                            "stream_type": stream_type,
-                            "format": "z16" if stream_type == "depth" else "y8" if stream_type.startswith("infrared") else "rgb8",
-                            "resolution": {"width": 640, "height": 480},
-                            "framerate": 30
-                        }
-                    new_stream_configs.append(stream_config)
-                
-                # Increment reference count
-                if stream_type == "pointcloud":
-                    # For pointcloud, increment both pointcloud and depth reference counts
-                    if "pointcloud" not in self.stream_references[device_id]:
-                        self.stream_references[device_id]["pointcloud"] = 0
-                    if "depth" not in self.stream_references[device_id]:
-                        self.stream_references[device_id]["depth"] = 0
-                    self.stream_references[device_id]["pointcloud"] += 1
-                    self.stream_references[device_id]["depth"] += 1
-                else:
-                    self.stream_references[device_id][stream_type] += 1
-            
-            # Handle device stream configuration
-            if need_to_start_stream:
-                if device_id in self.device_stream_configs:
-                    # Device is already streaming, we need to restart with new configuration
-                    # Get existing configs and merge with new ones
-                    existing_configs = self.device_stream_configs[device_id]["configs"]
-                    
-                    # Create a set of existing stream types to avoid duplicates
-                    existing_stream_types = {config["stream_type"] for config in existing_configs}
-                    
-                    # Add new stream configs that don't already exist
-                    for new_config in new_stream_configs:
-                        if new_config["stream_type"] not in existing_stream_types:
-                            existing_configs.append(new_config)
-                    
-                    # Update the device stream with merged configuration
-                    try:
-                        from app.models.stream import StreamConfig, Resolution
-                        
-                        # Convert all configs to StreamConfig objects
-                        stream_configs = []
-                        for config in existing_configs:
-                            stream_config = StreamConfig(
-                                sensor_id=config["sensor_id"],
-                                stream_type=config["stream_type"],
-                                format=config["format"],
-                                resolution=Resolution(
-                                    width=config["resolution"]["width"],
-                                    height=config["resolution"]["height"]
-                                ),
-                                framerate=config["framerate"]
-                            )
-                            stream_configs.append(stream_config)
-                        
-                        # Stop current stream and restart with new configuration
-                        self.realsense_manager.stop_stream(device_id)
-                        self.realsense_manager.start_stream(device_id, stream_configs)
-                        
-                        # Enable point cloud processing if pointcloud stream is requested
-                        if any(stream_type == "pointcloud" for stream_type in stream_types):
-                            self.realsense_manager.activate_point_cloud(device_id, True)
-                        
-                        # Update stored configuration
-                        self.device_stream_configs[device_id] = {
-                            "configs": existing_configs,
-                            "started_at": time.time()
-                        }
-                        
-                        print(f"Restarted device stream for {device_id} with {len(existing_configs)} stream types")
-                    except Exception as e:
-                        # Rollback reference counts on failure
-                        for stream_type in stream_types:
-                            if stream_type in self.stream_references[device_id]:
-                                self.stream_references[device_id][stream_type] -= 1
-                                if self.stream_references[device_id][stream_type] <= 0:
-                                    del self.stream_references[device_id][stream_type]
-                        raise RealSenseError(status_code=400, detail=f"Failed to restart device stream: {str(e)}")
-                else:
-                    # First time starting device stream
-                    try:
-                        from app.models.stream import StreamConfig, Resolution
-                        
-                        # Convert configs to StreamConfig objects
-                        stream_configs = []
-                        for config in new_stream_configs:
-                            stream_config = StreamConfig(
-                                sensor_id=config["sensor_id"],
-                                stream_type=config["stream_type"],
-                                format=config["format"],
-                                resolution=Resolution(
-                                    width=config["resolution"]["width"],
-                                    height=config["resolution"]["height"]
-                                ),
-                                framerate=config["framerate"]
-                            )
-                            stream_configs.append(stream_config)
-                        
-                        # Start the actual RealSense stream
-                        print(f"Starting device stream for {device_id} with {len(stream_configs)} stream types")
-                        self.realsense_manager.start_stream(device_id, stream_configs)
-                        
-                        # Enable point cloud processing if pointcloud stream is requested
-                        if any(stream_type == "pointcloud" for stream_type in stream_types):
-                            self.realsense_manager.activate_point_cloud(device_id, True)
-                        
-                        # Store configuration after successful start
-                        self.device_stream_configs[device_id] = {
-                            "configs": new_stream_configs,
-                            "started_at": time.time()
-                        }
-                        
-                        print(f"Started device stream for {device_id} with {len(new_stream_configs)} stream types")
-                    except Exception as e:
-                        # Rollback reference counts on failure
-                        for stream_type in stream_types:
-                            if stream_type in self.stream_references[device_id]:
-                                self.stream_references[device_id][stream_type] -= 1
-                                if self.stream_references[device_id][stream_type] <= 0:
-                                    del self.stream_references[device_id][stream_type]
-                        raise RealSenseError(status_code=400, detail=f"Failed to start device stream: {str(e)}")
-                    
-                    # Small delay to prevent race conditions
-                    await asyncio.sleep(0.05)
-            
-            return need_to_start_stream
+        # Validate stream types before processing
+        invalid_stream_types = set(stream_types) - _VALID_STREAM_TYPES
+        if invalid_stream_types:
+            raise InvalidStreamTypeError(
+                f"Invalid stream type: {', '.join(sorted(invalid_stream_types))}. Valid types are: {', '.join(sorted(_VALID_STREAM_TYPES))}"
+            )
+
+        # Bookkeeping first; the device is then reconfigured under its own lock only
+        needs_apply = self._plan_stream_change(device_id, add=stream_types)
+        if not needs_apply:
+            return False
+
+        try:
+            await self._apply_stream_change(device_id)
+        except Exception as e:
+            # Rollback reference counts on failure, then put the device back in line with the plan
+            self._plan_stream_change(device_id, remove=stream_types)
+            try:
+                await self._apply_stream_change(device_id)
+            except Exception as restore_error:
+                logger.warning("Failed to restore device stream for %s: %s", device_id, restore_error)
+            raise StreamActivationError(f"Failed to start device stream: {str(e)}")
+        return True
 
     async def _decrement_stream_references(self, device_id: str, stream_types: List[str]):
         """Decrement reference counts and stop device stream if no more references."""
-        async with self.lock:
-            if device_id not in self.stream_references:
-                return
-            
-            should_stop_device_stream = True
-            removed_stream_types = []
-            
-            for stream_type in stream_types:
-                if stream_type == "pointcloud":
-                    # For pointcloud, decrement both pointcloud and depth reference counts
-                    if "pointcloud" in self.stream_references[device_id]:
-                        self.stream_references[device_id]["pointcloud"] -= 1
-                        if self.stream_references[device_id]["pointcloud"] <= 0:
-                            del self.stream_references[device_id]["pointcloud"]
-                    
-                    if "depth" in self.stream_references[device_id]:
-                        self.stream_references[device_id]["depth"] -= 1
-                        
-                        # If depth still has references, don't stop device stream
-                        if self.stream_references[device_id]["depth"] > 0:
-                            should_stop_device_stream = False
-                        
-                        # Clean up zero references
-                        if self.stream_references[device_id]["depth"] <= 0:
-                            del self.stream_references[device_id]["depth"]
-                            removed_stream_types.append("depth")
-                elif stream_type in self.stream_references[device_id]:
-                    self.stream_references[device_id][stream_type] -= 1
-                    
-                    # If any stream type still has references, don't stop device stream
-                    if self.stream_references[device_id][stream_type] > 0:
-                        should_stop_device_stream = False
-                    
-                    # Clean up zero references
-                    if self.stream_references[device_id][stream_type] <= 0:
-                        del self.stream_references[device_id][stream_type]
-                        removed_stream_types.append(stream_type)
-            
-            # If we removed stream types and device is still streaming, update configuration
-            if removed_stream_types and device_id in self.device_stream_configs:
+        await self._decrement_many({device_id: stream_types})
+
+    async def _decrement_many(self, released: Dict[str, List[str]]):
+        """Decrement references for several devices at once, reconfiguring each affected device once.
+
+        Devices are applied concurrently; each only holds its own device lock.
+        """
+        changed = [
+            device_id for device_id, stream_types in released.items()
+            if device_id in self.stream_references and self._plan_stream_change(device_id, remove=stream_types)
+        ]
+        results = await asyncio.gather(
+            *(self._apply_stream_change(device_id) for device_id in changed),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                logger.warning("Error updating device stream configuration: %s", result)
+
+    async def _wait_for_streams(self, device_id: str, stream_types: List[str]) -> Optional[str]:
+        """Wait until the device reports every requested stream type as active.
+
+        An already-running device returns on the first check. Otherwise the status is checked
+        again each time the capture thread delivers a frameset, or after a jittered backoff if
+        none arrives, for up to STREAM_READY_TIMEOUT, so the wait ends as soon as the streams
+        come up. Returns None once ready, or a description of what is still missing.
+        """
+        requested = set(stream_types) - {"pointcloud"}
+        needs_depth = "pointcloud" in stream_types
+        loop = asyncio.get_running_loop()
+        frameset_arrived = asyncio.Event()
+        listener = lambda: loop.call_soon_threadsafe(frameset_arrived.set)
+        self.realsense_manager.add_frame_listener(device_id, listener)
+        try:
+            deadline = loop.time() + STREAM_READY_TIMEOUT
+            recheck = STREAM_READY_RECHECK
+            yielded = False
+            while True:
+                frameset_arrived.clear()
+                stream_status = self.realsense_manager.get_stream_status(device_id)
+                if not stream_status.is_streaming:
+                    not_ready = f"Device {device_id} is not streaming after {STREAM_READY_TIMEOUT}s"
+                else:
+                    # Check if all requested stream types are available, reading active_streams once
+                    active_streams = frozenset(stream_status.active_streams)
+                    missing_streams = sorted(requested - active_streams)
+                    if needs_depth and "depth" not in active_streams:
+                        # For pointcloud, check if depth stream is available
+                        missing_streams.append("depth (required for pointcloud)")
+                    if not missing_streams:
+                        return None
+                    not_ready = f"Stream types {missing_streams} are not active after {STREAM_READY_TIMEOUT}s"
+
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    # Out of budget; don't wait again after the final check
+                    return not_ready
+                if not yielded:
+                    # Streams often come up within a loop tick of the apply; recheck after a bare yield first
+                    yielded = True
+                    await asyncio.sleep(0)
+                    continue
                 try:
-                    # Get current configuration and remove unused stream types
-                    current_configs = self.device_stream_configs[device_id]["configs"]
-                    updated_configs = [
-                        config for config in current_configs 
-                        if config["stream_type"] not in removed_stream_types
-                    ]
-                    
-                    if updated_configs:
-                        # Update device stream with remaining stream types
-                        from app.models.stream import StreamConfig, Resolution
-                        
-                        stream_configs = []
-                        for config in updated_configs:
-                            stream_config = StreamConfig(
-                                sensor_id=config["sensor_id"],
-                                stream_type=config["stream_type"],
-                                format=config["format"],
-                                resolution=Resolution(
-                                    width=config["resolution"]["width"],
-                                    height=config["resolution"]["height"]
-                                ),
-                                framerate=config["framerate"]
-                            )
-                            stream_configs.append(stream_config)
-                        
-                        try:
-                            # Stop current stream first
-                            self.realsense_manager.stop_stream(device_id)
-                            
-                            # Wait a moment for cleanup
-                            await asyncio.sleep(0.1)
-                            
-                            # Start new stream with updated configuration
-                            self.realsense_manager.start_stream(device_id, stream_configs)
-                            
-                            # Disable point cloud processing if no pointcloud streams remain
-                            if not any(stream_type == "pointcloud" for stream_type in self.stream_references.get(device_id, {})):
-                                self.realsense_manager.activate_point_cloud(device_id, False)
-                            
-                            # Update stored configuration
-                            self.device_stream_configs[device_id] = {
-                                "configs": updated_configs,
-                                "started_at": time.time()
-                            }
-                        except Exception as e:
-                            print(f"Error updating device stream configuration: {str(e)}")
-                            # If update fails, try to restart with original configuration
-                            try:
-                                self.realsense_manager.stop_stream(device_id)
-                                await asyncio.sleep(0.1)
-                                # Restart with original configs
-                                original_configs = []
-                                for config in current_configs:
-                                    stream_config = StreamConfig(
-                                        sensor_id=config["sensor_id"],
-                                        stream_type=config["stream_type"],
-                                        format=config["format"],
-                                        resolution=Resolution(
-                                            width=config["resolution"]["width"],
-                                            height=config["resolution"]["height"]
-                                        ),
-                                        framerate=config["framerate"]
-                                    )
-                                    original_configs.append(stream_config)
-                                self.realsense_manager.start_stream(device_id, original_configs)
-                            except Exception as restart_error:
-                                print(f"Failed to restart with original configuration: {str(restart_error)}")
-                        
-                        print(f"Updated device stream for {device_id} - removed {removed_stream_types}, now has {len(updated_configs)} stream types")
-                    else:
-                        # No more stream types, stop device stream
-                        self.realsense_manager.stop_stream(device_id)
-                        print(f"Stopped device stream for {device_id} - no more active stream types")
-                        
-                        # Clean up device references
-                        del self.stream_references[device_id]
-                        del self.device_stream_configs[device_id]
-                        
-                except Exception as e:
-                    print(f"Error updating device stream configuration: {str(e)}")
-            
-            # If no more references for any stream type, stop device stream
-            elif should_stop_device_stream and device_id in self.stream_references:
-                if not any(self.stream_references[device_id].values()):
-                    try:
-                        # Stop the device stream
-                        self.realsense_manager.stop_stream(device_id)
-                        print(f"Stopped device stream for {device_id} - no more active sessions")
-                        
-                        # Clean up device references
-                        del self.stream_references[device_id]
-                        if device_id in self.device_stream_configs:
-                            del self.device_stream_configs[device_id]
-                    except Exception as e:
-                        print(f"Error stopping device stream: {str(e)}")
+                    await asyncio.wait_for(frameset_arrived.wait(), min(recheck * (0.5 + random.random()), remaining))
+                except asyncio.TimeoutError:
+                    recheck = min(recheck * 2, STREAM_READY_RECHECK_MAX)
+        finally:
+            self.realsense_manager.remove_frame_listener(device_id, listener)
+
+    def _acquire_video_track(self, device_id: str, stream_type: str) -> VideoStreamTrack:
+        """Return a relay of the shared source track for a device stream, creating the source on first use."""
+        key = (device_id, stream_type)
+        source = self._shared_tracks.get(key)
+        if source is None:
+            if stream_type == "pointcloud":
+                # Use special point cloud video track
+                source = PointCloudVideoTrack(self.realsense_manager, device_id, stream_type)
+            else:
+                # Use regular video track
+                source = RealSenseVideoTrack(self.realsense_manager, device_id, stream_type, frame_broker=self.frame_broker)
+            self._shared_tracks[key] = source
+        self._shared_track_refs[key] = self._shared_track_refs.get(key, 0) + 1
+        # Unbuffered: a slow viewer gets the latest frame instead of a growing backlog
+        return self._relay.subscribe(source, buffered=False)
+
+    def _release_video_tracks(self, device_id: str, relay_tracks: List[Tuple[str, VideoStreamTrack]]):
+        """Stop relay tracks and stop each shared source once its last viewer is gone."""
+        for stream_type, relay_track in relay_tracks:
+            relay_track.stop()
+            key = (device_id, stream_type)
+            refs = self._shared_track_refs.get(key, 0) - 1
+            if refs > 0:
+                self._shared_track_refs[key] = refs
+                continue
+            self._shared_track_refs.pop(key, None)
+            source = self._shared_tracks.pop(key, None)
+            if source is not None:
+                source.stop()
+
+    def _release_session_tracks(self, session: Dict[str, Any]):
+        """Release a session's relay tracks; safe to call more than once."""
+        relay_tracks, session["video_tracks"] = session.get("video_tracks", []), []
+        self._release_video_tracks(session["device_id"], relay_tracks)
+
+    def _use_hw_encoder(self, pc: RTCPeerConnection, sender: RTCRtpSender):
+        """Negotiate H.264 for a sender, which install_hardware_encoder routes to the hardware encoder."""
+        for transceiver in pc.getTransceivers():
+            if transceiver.sender is sender:
+                transceiver.setCodecPreferences(h264_codec_preferences())
+
+    def _set_connected(self, session: Dict[str, Any], connected: bool):
+        """Update a session's connected flag and the active session count with it."""
+        if session["connected"] == connected:
+            return
+        session["connected"] = connected
+        self._active_session_count += 1 if connected else -1
 
     async def create_offer(self, device_id: str, stream_types: List[str], session_id: str = None) -> Tuple[str, dict]:
         """Create a WebRTC offer for device streams."""
         # Check if we have too many active sessions
-        async with self.lock:
-            active_sessions = len([s for s in self.sessions.values() if s.get("connected", False)])
-            if active_sessions >= self.max_concurrent_sessions:
-                raise RealSenseError(
-                    status_code=429, 
-                    detail=f"Maximum concurrent sessions ({self.max_concurrent_sessions}) reached. Please wait for a session to close."
-                )
+        if self._active_session_count >= self.max_concurrent_sessions:
+            raise MaxSessionsError(
+                f"Maximum concurrent sessions ({self.max_concurrent_sessions}) reached. Please wait for a session to close."
+            )
 
-        # Track if we need to rollback references on failure
+        # Track if we need to rollback references and shared tracks on failure
         references_added = False
+        relay_tracks: List[Tuple[str, VideoStreamTrack]] = []
+        senders = []
         
         try:
             # Ensure device stream is running for requested stream types
-            need_to_start_stream = await self._ensure_device_stream(device_id, stream_types)
+            # (this also starts or reconfigures the device stream when needed)
+            await self._ensure_device_stream(device_id, stream_types)
             references_added = True
-            
-            if need_to_start_stream:
-                # Start the device stream with the required configuration
-                try:
-                    from app.models.stream import StreamConfig, Resolution
-                    
-                    # Convert dictionary configs to StreamConfig objects
-                    stream_configs = []
-                    for config in self.device_stream_configs[device_id]["configs"]:
-                        stream_config = StreamConfig(
-                            sensor_id=config["sensor_id"],
-                            stream_type=config["stream_type"],
-                            format=config["format"],
-                            resolution=Resolution(
-                                width=config["resolution"]["width"],
-                                height=config["resolution"]["height"]
-                            ),
-                            framerate=config["framerate"]
-                        )
-                        stream_configs.append(stream_config)
-                    
-                    self.realsense_manager.start_stream(device_id, stream_configs)
-                    print(f"Started device stream for {device_id} with {len(stream_configs)} stream types")
-                except Exception as e:
-                    # Rollback reference counts on failure
-                    await self._decrement_stream_references(device_id, stream_types)
-                    references_added = False
-                    raise RealSenseError(status_code=400, detail=f"Failed to start device stream: {str(e)}")
 
             # Verify device is streaming and requested stream types are available
-            # Add retry mechanism for stream activation
-            max_retries = 5
-            retry_delay = 0.5  # seconds
-            
-            for attempt in range(max_retries):
-                stream_status = self.realsense_manager.get_stream_status(device_id)
-                
-                if not stream_status.is_streaming:
-                    if attempt < max_retries - 1:
-                        print(f"Device {device_id} not streaming yet, retrying in {retry_delay}s (attempt {attempt + 1}/{max_retries})")
-                        await asyncio.sleep(retry_delay)
-                        continue
-                    else:
-                        # Rollback reference counts if device is not streaming
-                        await self._decrement_stream_references(device_id, stream_types)
-                        references_added = False
-                        raise RealSenseError(status_code=400, detail=f"Device {device_id} is not streaming after {max_retries} attempts")
-
-                # Check if all requested stream types are available
-                missing_streams = []
-                for stream_type in stream_types:
-                    if stream_type == "pointcloud":
-                        # For pointcloud, check if depth stream is available
-                        if "depth" not in stream_status.active_streams:
-                            missing_streams.append("depth (required for pointcloud)")
-                    elif stream_type not in stream_status.active_streams:
-                        missing_streams.append(stream_type)
-                
-                if missing_streams:
-                    if attempt < max_retries - 1:
-                        print(f"Stream types {missing_streams} not active yet, retrying in {retry_delay}s (attempt {attempt + 1}/{max_retries})")
-                        await asyncio.sleep(retry_delay)
-                        continue
-                    else:
-                        # Rollback reference counts if stream types are not available
-                        await self._decrement_stream_references(device_id, stream_types)
-                        references_added = False
-                        raise RealSenseError(status_code=400, detail=f"Stream types {missing_streams} are not active after {max_retries} attempts")
-                
-                # All streams are active, break out of retry loop
-                print(f"All requested stream types are active after {attempt + 1} attempts")
-                break
+            not_ready = await self._wait_for_streams(device_id, stream_types)
+            if not_ready:
+                # Rollback reference counts if the streams never became active
+                await self._decrement_stream_references(device_id, stream_types)
+                references_added = False
+                raise StreamActivationError(not_ready)
 
             # Create peer connection
             pc = RTCPeerConnection(RTCConfiguration(iceServers=self.ice_servers))
@@ -661,40 +1075,45 @@ class WebRTCManager:
 
             # Create data channel for point cloud data if depth stream is requested
             data_channel = None
+            # Set once the session is stored, so the sender started by the data channel can find it
+            registered = asyncio.Event()
+            sender_stop = asyncio.Event()
             if "depth" in stream_types:
                 data_channel = pc.createDataChannel("pointcloud-data")
                 
                 # Set up data channel event handlers
                 @data_channel.on("open")
                 def on_open():
-                    print(f"📡 Data channel opened for session {session_id}")
+                    logger.debug("📡 Data channel opened for session %s", session_id)
                     # Start sending point cloud data
-                    asyncio.create_task(self._send_point_cloud_data(session_id, device_id))
+                    asyncio.create_task(self._send_point_cloud_data(session_id, device_id, registered))
                 
                 @data_channel.on("close")
                 def on_close():
-                    print(f"📡 Data channel closed for session {session_id}")
+                    logger.debug("📡 Data channel closed for session %s", session_id)
+                    sender_stop.set()
 
-            # Add video tracks for each stream type
-            video_tracks = []
+            # Add video tracks for each stream type, relayed from the shared source tracks
             for stream_type in stream_types:
-                if stream_type == "pointcloud":
-                    # Use special point cloud video track
-                    video_track = PointCloudVideoTrack(self.realsense_manager, device_id, stream_type, session_id)
-                else:
-                    # Use regular video track
-                    video_track = RealSenseVideoTrack(self.realsense_manager, device_id, stream_type, session_id)
-                pc.addTrack(video_track)
-                video_tracks.append(video_track)
+                relay_track = self._acquire_video_track(device_id, stream_type)
+                relay_tracks.append((stream_type, relay_track))
+                sender = pc.addTrack(relay_track)
+                if self.hw_encoder:
+                    self._use_hw_encoder(pc, sender)
+                senders.append(sender)
 
             # Set up connection state change handler
             async def on_connection_state_change():
-                async with self.lock:
-                    if session_id in self.sessions:
-                        self.sessions[session_id]["connection_state"] = pc.connectionState
-                        if pc.connectionState == "closed":
-                            # Mark for cleanup
-                            self.sessions[session_id]["should_cleanup"] = True
+                session = self.sessions.get(session_id)
+                if session is None:
+                    return
+                async with session["lock"]:
+                    session["connection_state"] = pc.connectionState
+                    if pc.connectionState in ("failed", "closed"):
+                        self._set_connected(session, False)
+                    if pc.connectionState == "closed":
+                        # Mark for cleanup
+                        session["should_cleanup"] = True
 
             pc.on("connectionstatechange", on_connection_state_change)
 
@@ -703,61 +1122,64 @@ class WebRTCManager:
             await pc.setLocalDescription(offer)
 
             # Store session
-            async with self.lock:
-                self.sessions[session_id] = {
-                    "device_id": device_id,
-                    "stream_types": stream_types,
-                    "pc": pc,
-                    "video_tracks": video_tracks,
-                    "data_channel": data_channel,
-                    "connected": False,
-                    "connection_state": "new",
-                    "created_at": time.time(),
-                    "last_activity": time.time(),
-                    "should_cleanup": False
-                }
-
-            # Schedule cleanup of unused sessions
-            asyncio.create_task(self._cleanup_sessions())
+            self.sessions[session_id] = {
+                "device_id": device_id,
+                "stream_types": stream_types,
+                "pc": pc,
+                "video_tracks": relay_tracks,  # (stream_type, relay track) per sender
+                "senders": senders,
+                "data_channel": data_channel,
+                "connected": False,
+                "connection_state": "new",
+                "created_at": time.monotonic(),
+                "last_activity": time.monotonic(),
+                "should_cleanup": False,
+                "lock": asyncio.Lock(),
+                "closed": sender_stop,  # Set by close_session/cleanup or the data channel closing; stops the point cloud sender
+            }
+            registered.set()
 
             # Return session ID and offer
+            # localDescription re-serializes the SDP on every access; read it once
+            local_description = pc.localDescription
             return session_id, {
-                "sdp": pc.localDescription.sdp,
-                "type": pc.localDescription.type
+                "sdp": local_description.sdp,
+                "type": local_description.type
             }
             
         except Exception as e:
+            # Release shared tracks acquired for this offer
+            self._release_video_tracks(device_id, relay_tracks)
+
             # If we added references but failed later, roll them back
             if references_added:
                 try:
                     await self._decrement_stream_references(device_id, stream_types)
                 except Exception as rollback_error:
-                    print(f"Error rolling back references: {str(rollback_error)}")
+                    logger.warning("Error rolling back references: %s", rollback_error)
             
             # Re-raise the original exception
             raise e
 
     async def process_answer(self, session_id: str, sdp: str, type_: str) -> bool:
         """Process a WebRTC answer."""
-        async with self.lock:
-            if session_id not in self.sessions:
-                raise RealSenseError(status_code=404, detail=f"Session {session_id} not found")
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise SessionNotFoundError(f"Session {session_id} not found")
 
-            session = self.sessions[session_id]
-            pc = session["pc"]
+        pc = session["pc"]
 
-            # Update last activity
-            session["last_activity"] = time.time()
+        # Update last activity
+        session["last_activity"] = time.monotonic()
 
         # Set remote description
         try:
             await pc.setRemoteDescription(RTCSessionDescription(sdp=sdp, type=type_))
 
             # Mark as connected
-            async with self.lock:
-                if session_id in self.sessions:
-                    self.sessions[session_id]["connected"] = True
-                    self.sessions[session_id]["last_activity"] = time.time()
+            async with session["lock"]:
+                self._set_connected(session, True)
+                session["last_activity"] = time.monotonic()
 
             return True
         except Exception as e:
@@ -765,64 +1187,95 @@ class WebRTCManager:
 
     async def add_ice_candidate(self, session_id: str, candidate: str, sdp_mid: str, sdp_mline_index: int) -> bool:
         """Add an ICE candidate to a session."""
-        async with self.lock:
-            if session_id not in self.sessions:
-                raise RealSenseError(status_code=404, detail=f"Session {session_id} not found")
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise SessionNotFoundError(f"Session {session_id} not found")
 
-            session = self.sessions[session_id]
-            pc = session["pc"]
+        pc = session["pc"]
 
-            # Update last activity
-            session["last_activity"] = time.time()
+        # Update last activity
+        session["last_activity"] = time.monotonic()
 
         # Add ICE candidate
         try:
-            candidate_obj = RTCIceCandidate(
-                component=1,
-                foundation="0",
-                ip="0.0.0.0",
-                port=0,
-                priority=0,
-                protocol="udp",
-                type="host",
-                sdpMid=sdp_mid,
-                sdpMLineIndex=sdp_mline_index
-            )
-            candidate_obj.candidate = candidate
-
-            await pc.addIceCandidate(candidate_obj)
+            await pc.addIceCandidate(self._make_ice_candidate(candidate, sdp_mid, sdp_mline_index))
             return True
         except Exception as e:
             raise RealSenseError(status_code=400, detail=f"Error adding ICE candidate: {str(e)}")
 
+    async def add_ice_candidates(self, candidates: List[ICECandidate]) -> int:
+        """Add a batch of ICE candidates, resolving all their sessions before adding any."""
+        peer_connections = []
+        now = time.monotonic()
+        for item in candidates:
+            session = self.sessions.get(item.session_id)
+            if session is None:
+                raise SessionNotFoundError(f"Session {item.session_id} not found")
+
+            session["last_activity"] = now
+            peer_connections.append(session["pc"])
+
+        try:
+            await asyncio.gather(*(
+                pc.addIceCandidate(self._make_ice_candidate(item.candidate, item.sdpMid, item.sdpMLineIndex))
+                for item, pc in zip(candidates, peer_connections)
+            ))
+            return len(candidates)
+        except Exception as e:
+            raise RealSenseError(status_code=400, detail=f"Error adding ICE candidate: {str(e)}")
+
+    @staticmethod
+    def _make_ice_candidate(candidate: str, sdp_mid: str, sdp_mline_index: int) -> RTCIceCandidate:
+        candidate_obj = RTCIceCandidate(
+            component=1,
+            foundation="0",
+            ip="0.0.0.0",
+            port=0,
+            priority=0,
+            protocol="udp",
+            type="host",
+            sdpMid=sdp_mid,
+            sdpMLineIndex=sdp_mline_index
+        )
+        candidate_obj.candidate = candidate
+        return candidate_obj
+
     async def get_ice_candidates(self, session_id: str) -> List[dict]:
         """Get ICE candidates for a session."""
-        async with self.lock:
-            if session_id not in self.sessions:
-                raise RealSenseError(status_code=404, detail=f"Session {session_id} not found")
-
-            pc = self.sessions[session_id]["pc"]
+        if self.sessions.get(session_id) is None:
+            raise SessionNotFoundError(f"Session {session_id} not found")
 
         # ICE candidates would be sent via events in a real application
         # This is a placeholder for the API
         return []
 
-    async def get_session(self, session_id: str) -> WebRTCStatus:
-        """Get session status."""
-        async with self.lock:
-            if session_id not in self.sessions:
-                raise RealSenseError(status_code=404, detail=f"Session {session_id} not found")
-
-            session = self.sessions[session_id]
-            pc = session["pc"]
+    def _dropped_frames(self, session: Dict[str, Any]) -> int:
+        """Total frame slots skipped by the shared source tracks a session is viewing."""
+        return sum(
+            getattr(self._shared_tracks.get((session["device_id"], stream_type)), "dropped_frames", 0)
+            for stream_type, _ in session.get("video_tracks", [])
+        )
 
-        # Get WebRTC stats (if available)
-        stats = None
+    async def _cached_stats(self, session_id: str, session: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Return the session's projected WebRTC stats, querying the peer connection at most once per STATS_CACHE_TTL."""
+        cached = self.stats_cache.get(session_id)
+        if cached is not None and time.monotonic() - cached[0] < STATS_CACHE_TTL:
+            return cached[1]
         try:
-            stats_dict = await pc.getStats()
-            stats = {k: v.__dict__ for k, v in stats_dict.items()}
+            stats = _project_stats(await session["pc"].getStats())
         except Exception:
             stats = None
+        self.stats_cache[session_id] = (time.monotonic(), stats)
+        return stats
+
+    async def get_session(self, session_id: str) -> WebRTCStatus:
+        """Get session status."""
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise SessionNotFoundError(f"Session {session_id} not found")
+
+        # Get WebRTC stats (if available)
+        stats = await self._cached_stats(session_id, session)
 
         # Return session status
         return WebRTCStatus(
@@ -831,140 +1284,129 @@ class WebRTCManager:
             connected=session["connected"],
             streaming=session["connected"],
             stream_types=session["stream_types"],
-            stats=stats
+            stats=stats,
+            dropped_frames=self._dropped_frames(session)
         )
 
     async def get_all_sessions(self) -> List[WebRTCStatus]:
         """Get status of all active sessions."""
-        async with self.lock:
-            sessions = []
-            for session_id, session in self.sessions.items():
-                try:
-                    pc = session["pc"]
-                    stats = None
-                    try:
-                        stats_dict = await pc.getStats()
-                        stats = {k: v.__dict__ for k, v in stats_dict.items()}
-                    except Exception:
-                        stats = None
-
-                    sessions.append(WebRTCStatus(
-                        session_id=session_id,
-                        device_id=session["device_id"],
-                        connected=session["connected"],
-                        streaming=session["connected"],
-                        stream_types=session["stream_types"],
-                        stats=stats
-                    ))
-                except Exception:
-                    # Skip sessions that can't be queried
-                    continue
-            return sessions
+        # Snapshot the map and query every peer connection concurrently, without holding a lock
+        snapshot = list(self.sessions.items())
+
+        # Only sessions whose cached stats have expired are queried again
+        all_stats = await asyncio.gather(
+            *(self._cached_stats(session_id, session) for session_id, session in snapshot)
+        )
+
+        # Drop cached stats for sessions that have gone away
+        live_ids = {session_id for session_id, _ in snapshot}
+        for session_id in [sid for sid in self.stats_cache if sid not in live_ids]:
+            del self.stats_cache[session_id]
+
+        sessions = []
+        for (session_id, session), stats in zip(snapshot, all_stats):
+            try:
+                sessions.append(WebRTCStatus(
+                    session_id=session_id,
+                    device_id=session["device_id"],
+                    connected=session["connected"],
+                    streaming=session["connected"],
+                    stream_types=session["stream_types"],
+                    stats=stats,
+                    dropped_frames=self._dropped_frames(session)
+                ))
+            except Exception:
+                # Skip sessions that can't be queried
+                continue
+        return sessions
 
     async def switch_stream_type(self, session_id: str, new_stream_types: List[str]) -> bool:
         """Switch stream types within an existing WebRTC session."""
         try:
             async with asyncio.timeout(10.0):  # 10 second timeout for entire operation
-                # First, get session info while holding the lock
-                async with self.lock:
-                    if session_id not in self.sessions:
-                        raise RealSenseError(status_code=404, detail=f"Session {session_id} not found")
+                # First, get session info while holding the session's lock
+                session = self.sessions.get(session_id)
+                if session is None:
+                    raise SessionNotFoundError(f"Session {session_id} not found")
 
-                    session = self.sessions[session_id]
+                async with session["lock"]:
                     device_id = session["device_id"]
                     video_tracks = session["video_tracks"]
+                    senders = session["senders"]
                     old_stream_types = session["stream_types"]
 
-                    print(f"🔄 Switching stream types for session {session_id} from {old_stream_types} to {new_stream_types}")
+                    logger.info("🔄 Switching stream types for session %s from %s to %s", session_id, old_stream_types, new_stream_types)
 
                     # Update stream types in session first
                     session["stream_types"] = new_stream_types
-                    session["last_activity"] = time.time()
+                    session["last_activity"] = time.monotonic()
 
                 # Release lock before calling _ensure_device_stream to avoid deadlock
-                print(f"🚀 Starting new device stream for {device_id} with types: {new_stream_types}")
-                print(f"🔍 About to call _ensure_device_stream...")
+                logger.info("🚀 Starting new device stream for %s with types: %s", device_id, new_stream_types)
+                logger.debug("🔍 About to call _ensure_device_stream...")
                 await self._ensure_device_stream(device_id, new_stream_types)
-                print(f"✅ _ensure_device_stream completed")
+                logger.info("✅ _ensure_device_stream completed")
 
                 # Wait for new stream to be fully active
-                max_retries = 5
-                retry_delay = 0.2
-                for attempt in range(max_retries):
-                    stream_status = self.realsense_manager.get_stream_status(device_id)
-                    active_streams = set(stream_status.active_streams)
-                    new_streams_set = set(new_stream_types)
-                    
-                    if new_streams_set.issubset(active_streams):
-                        print(f"✅ New stream types {new_stream_types} are active after {attempt + 1} attempts")
-                        print(f"📊 Active streams: {active_streams}")
-                        break
-                    print(f"⏳ Waiting for new stream types to activate (attempt {attempt + 1}/{max_retries})")
-                    print(f"📊 Current active streams: {active_streams}, waiting for: {new_stream_types}")
-                    await asyncio.sleep(retry_delay)
-
-                # Re-acquire lock to update video tracks and stream references
-                async with self.lock:
-                    # Now update the video track stream types so they request from the new stream
-                    for i, track in enumerate(video_tracks):
-                        if i < len(new_stream_types):
-                            if hasattr(track, 'switch_stream_type'):
-                                track.switch_stream_type(new_stream_types[i])
-                                print(f"✅ Switched track {i} to stream type: {new_stream_types[i]}")
-
-                    # Update stream references (remove old, add new)
-                    for stream_type in old_stream_types:
-                        if device_id in self.stream_references and stream_type in self.stream_references[device_id]:
-                            self.stream_references[device_id][stream_type] -= 1
-                            if self.stream_references[device_id][stream_type] <= 0:
-                                del self.stream_references[device_id][stream_type]
-
-                    for stream_type in new_stream_types:
-                        if device_id not in self.stream_references:
-                            self.stream_references[device_id] = {}
-                        self.stream_references[device_id][stream_type] = self.stream_references[device_id].get(stream_type, 0) + 1
-
-                print(f"✅ Successfully switched stream types for session {session_id}")
+                not_ready = await self._wait_for_streams(device_id, new_stream_types)
+                if not_ready:
+                    logger.debug("⏳ %s", not_ready)
+                else:
+                    logger.debug("✅ New stream types %s are active", new_stream_types)
+
+                # Now point each sender at a relay of the new stream's shared track
+                for i, (stream_type, relay_track) in enumerate(list(video_tracks)):
+                    if i < len(new_stream_types) and new_stream_types[i] != stream_type:
+                        new_relay_track = self._acquire_video_track(device_id, new_stream_types[i])
+                        senders[i].replaceTrack(new_relay_track)
+                        video_tracks[i] = (new_stream_types[i], new_relay_track)
+                        self._release_video_tracks(device_id, [(stream_type, relay_track)])
+                        logger.info("✅ Switched track %s to stream type: %s", i, new_stream_types[i])
+
+                # _ensure_device_stream already referenced the new types; drop the old ones
+                await self._decrement_stream_references(device_id, old_stream_types)
+
+                logger.info("✅ Successfully switched stream types for session %s", session_id)
                 return True
         except asyncio.TimeoutError:
-            print(f"❌ Stream type switch timed out for session {session_id}")
+            logger.warning("❌ Stream type switch timed out for session %s", session_id)
             raise RealSenseError(status_code=500, detail="Stream type switch operation timed out")
         except Exception as e:
-            print(f"❌ Error switching stream types for session {session_id}: {str(e)}")
+            logger.warning("❌ Error switching stream types for session %s: %s", session_id, e)
             raise RealSenseError(status_code=500, detail=f"Failed to switch stream types: {str(e)}")
 
     async def close_session(self, session_id: str) -> bool:
         """Close a WebRTC session."""
-        async with self.lock:
-            if session_id not in self.sessions:
-                return False
+        session = self.sessions.get(session_id)
+        if session is None:
+            return False
 
-            session = self.sessions[session_id]
-            device_id = session["device_id"]
-            stream_types = session["stream_types"]
+        device_id = session["device_id"]
+        stream_types = session["stream_types"]
 
         # Close peer connection
         try:
             await session["pc"].close()
         except Exception as e:
-            print(f"Error closing peer connection for session {session_id}: {str(e)}")
+            logger.warning("Error closing peer connection for session %s: %s", session_id, e)
+        session["closed"].set()
+        self._release_session_tracks(session)
 
         # Decrement stream references with better error handling
         try:
             await self._decrement_stream_references(device_id, stream_types)
         except Exception as e:
-            print(f"Error decrementing stream references for session {session_id}: {str(e)}")
+            logger.warning("Error decrementing stream references for session %s: %s", session_id, e)
 
         # Remove session
-        async with self.lock:
-            if session_id in self.sessions:
-                del self.sessions[session_id]
-            return True
+        if self.sessions.pop(session_id, None) is session:
+            self._set_connected(session, False)
+        self.stats_cache.pop(session_id, None)
+        return True
 
     async def close_all_sessions(self) -> int:
         """Close all active WebRTC sessions."""
-        async with self.lock:
-            session_ids = list(self.sessions.keys())
+        session_ids = list(self.sessions.keys())
 
         closed_count = 0
         for session_id in session_ids:
@@ -972,152 +1414,183 @@ class WebRTCManager:
                 await self.close_session(session_id)
                 closed_count += 1
             except Exception as e:
-                print(f"Error closing session {session_id}: {str(e)}")
+                logger.warning("Error closing session %s: %s", session_id, e)
 
         return closed_count
 
     async def get_stream_reference_info(self) -> Dict[str, Any]:
         """Get information about stream references for debugging."""
-        async with self.lock:
-            return {
-                "stream_references": self.stream_references.copy(),
-                "device_stream_configs": {
-                    device_id: {
-                        "configs": config["configs"],
-                        "started_at": config["started_at"]
-                    }
-                    for device_id, config in self.device_stream_configs.items()
+        return {
+            "stream_references": {device_id: dict(references) for device_id, references in self.stream_references.items()},
+            "device_stream_configs": {
+                device_id: {
+                    "configs": [stream_config.model_dump() for stream_config in config["by_type"].values()],
+                    "started_at": config["started_at"]
                 }
+                for device_id, config in self.device_stream_configs.items()
             }
+        }
+
+    async def get_stream_reference_info_json(self) -> bytes:
+        """Stream reference info serialized as JSON, re-encoded only after the references change."""
+        version, body = self._references_json
+        if version != self._references_version:
+            version = self._references_version
+            body = orjson.dumps(await self.get_stream_reference_info())
+            self._references_json = (version, body)
+        return body
 
     async def _cleanup_sessions(self):
         """Clean up old or disconnected sessions."""
-        async with self.lock:
-            now = time.time()
-            session_ids = list(self.sessions.keys())
-
-            for session_id in session_ids:
-                session = self.sessions[session_id]
-
-                # Remove sessions that should be cleaned up
-                if session.get("should_cleanup", False):
-                    try:
-                        await session["pc"].close()
-                    except Exception:
-                        pass
-                    
-                    # Decrement stream references
-                    device_id = session["device_id"]
-                    stream_types = session["stream_types"]
-                    await self._decrement_stream_references(device_id, stream_types)
-                    
-                    del self.sessions[session_id]
-                    continue
-
-                # Remove sessions older than timeout
-                if now - session["created_at"] > self.session_timeout:
-                    try:
-                        await session["pc"].close()
-                    except Exception:
-                        pass
-                    
-                    # Decrement stream references
-                    device_id = session["device_id"]
-                    stream_types = session["stream_types"]
-                    await self._decrement_stream_references(device_id, stream_types)
-                    
-                    del self.sessions[session_id]
-                    continue
-
-                # Remove sessions with no activity for 30 minutes
-                if now - session["last_activity"] > 1800:  # 30 minutes
-                    try:
-                        await session["pc"].close()
-                    except Exception:
-                        pass
-                    
-                    # Decrement stream references
-                    device_id = session["device_id"]
-                    stream_types = session["stream_types"]
-                    await self._decrement_stream_references(device_id, stream_types)
-                    
-                    del self.sessions[session_id]
-                    continue
-
-        # Schedule next cleanup
-        await asyncio.sleep(60)  # Run cleanup every minute
-        asyncio.create_task(self._cleanup_sessions())
+        now = time.monotonic()
+
+        # Iterate a snapshot; only the sessions being closed are locked
+        expired = [
+            (session_id, session) for session_id, session in list(self.sessions.items())
+            if session.get("should_cleanup", False)  # Remove sessions that should be cleaned up
+            or now - session["created_at"] > self.session_timeout  # Remove sessions older than timeout
+            or now - session["last_activity"] > 1800  # Remove sessions with no activity for 30 minutes
+        ]
+        if not expired:
+            return
+
+        async def expire(session_id: str, session: Dict[str, Any]) -> bool:
+            async with session["lock"]:
+                if self.sessions.get(session_id) is not session:
+                    # Already closed elsewhere
+                    return False
+                try:
+                    await session["pc"].close()
+                except Exception:
+                    pass
+                session["closed"].set()
+                self._release_session_tracks(session)
+                self.sessions.pop(session_id, None)
+                self._set_connected(session, False)
+                return True
 
-    async def _send_point_cloud_data(self, session_id: str, device_id: str):
+        # Close peer connections concurrently, then release their streams in one batch per device
+        closed = await asyncio.gather(*(expire(session_id, session) for session_id, session in expired))
+        released: Dict[str, List[str]] = {}
+        for (_, session), was_closed in zip(expired, closed):
+            if was_closed:
+                released.setdefault(session["device_id"], []).extend(session["stream_types"])
+        await self._decrement_many(released)
+
+    async def _cleanup_loop(self):
+        """Periodically clean up sessions until stop() is called."""
+        while True:
+            try:
+                await self._cleanup_sessions()
+            except Exception as e:
+                logger.warning("Error cleaning up sessions: %s", e)
+            # Sleep until the next sweep, waking immediately on shutdown
+            try:
+                await asyncio.wait_for(self._shutdown.wait(), SESSION_CLEANUP_INTERVAL)
+                return
+            except asyncio.TimeoutError:
+                continue
+
+    async def start(self):
+        """Start the background session cleanup task."""
+        loop_type = type(asyncio.get_running_loop())
+        if not loop_type.__module__.startswith("uvloop"):
+            logger.info("WebRTC manager running on %s; install uvloop for lower scheduling overhead", loop_type.__name__)
+        if self._cleanup_task is None or self._cleanup_task.done():
+            self._shutdown.clear()
+            self._cleanup_task = asyncio.create_task(self._cleanup_loop())
+
+    async def stop(self):
+        """Stop the background session cleanup task, letting an in-progress sweep finish."""
+        self._shutdown.set()
+        if self._cleanup_task is not None:
+            await self._cleanup_task
+            self._cleanup_task = None
+
+    async def _send_point_cloud_data(self, session_id: str, device_id: str, registered: asyncio.Event):
         """Send point cloud data over WebRTC data channel"""
-        import json
-        import time
-        
         try:
-            print(f"🚀 Starting point cloud data transmission for session {session_id}")
-            
+            logger.info("🚀 Starting point cloud data transmission for session %s", session_id)
+
+            # The channel can open before create_offer has stored the session
+            try:
+                await asyncio.wait_for(registered.wait(), SESSION_REGISTER_TIMEOUT)
+            except asyncio.TimeoutError:
+                logger.warning("❌ Session %s was never registered", session_id)
+                return
+
             # Get the data channel for this session
-            async with self.lock:
-                session_data = self.sessions.get(session_id)
-                if not session_data:
-                    print(f"❌ Session {session_id} not found")
-                    return
-                data_channel = session_data.get("data_channel")
-                if not data_channel:
-                    print(f"❌ No data channel found for session {session_id}")
-                    return
+            session_data = self.sessions.get(session_id)
+            if not session_data:
+                logger.warning("❌ Session %s not found", session_id)
+                return
+            data_channel = session_data.get("data_channel")
+            if not data_channel:
+                logger.warning("❌ No data channel found for session %s", session_id)
+                return
+            # Captured once; the loop checks the event instead of looking the session up every update
+            closed = session_data["closed"]
             
+            # Set whenever the SCTP send buffer drains below the low-water mark
+            send_ready = asyncio.Event()
+            data_channel.bufferedAmountLowThreshold = DATA_CHANNEL_LOW_WATER
+            data_channel.on("bufferedamountlow", send_ready.set)
+
+            # Point cloud updates are numbered per session; chunks of one update share its id
+            message_id = 0
+            # Reused to assemble each binary message before its single copy into the sent bytes
+            message_buf = bytearray()
+            # Vertex stride, raised while the receiver is falling behind
+            stride = 1
+            # Message header reused for every chunk; fields that never change for this sender are set here
+            header: Dict[str, Any] = {
+                "type": "pointcloud-data",
+                "device_id": device_id,
+                "dtype": "i16",  # Payload element type, so clients can pick the typed array
+            }
+
             # Add keep-alive mechanism
-            last_heartbeat = time.time()
+            last_heartbeat = time.monotonic()
             heartbeat_interval = 30  # Send heartbeat every 30 seconds
-            
+
+            # Updates are paced against a deadline so send time doesn't lower the rate; the
+            # wait also covers iterations that found no new data
+            loop = asyncio.get_running_loop()
+            next_send = loop.time()
             while True:
+                delay = next_send - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                elif delay < -POINT_CLOUD_SEND_INTERVAL:
+                    # More than a frame behind: drop the missed updates rather than bursting to catch up
+                    next_send = loop.time()
+                next_send += POINT_CLOUD_SEND_INTERVAL
                 try:
-                    # Check if session still exists
-                    async with self.lock:
-                        if session_id not in self.sessions:
-                            print(f"📡 Session {session_id} no longer exists, stopping transmission")
-                            break
-                        session_data = self.sessions.get(session_id)
-                        if not session_data:
-                            break
-                        data_channel = session_data.get("data_channel")
-                        if not data_channel:
-                            break
+                    # Set when the session is closed or the data channel closes
+                    if closed.is_set():
+                        logger.debug("📡 Session %s or its data channel closed, stopping transmission", session_id)
+                        break
                     
                     # Send heartbeat to keep connection alive
-                    current_time = time.time()
+                    current_time = time.monotonic()
                     if current_time - last_heartbeat > heartbeat_interval:
-                        if data_channel.readyState == "open":
-                            try:
-                                heartbeat_message = {
-                                    "type": "heartbeat",
-                                    "timestamp": current_time,
-                                    "session_id": session_id
-                                }
-                                data_channel.send(json.dumps(heartbeat_message))
-                                print(f"💓 Sent heartbeat for session {session_id}")
-                                last_heartbeat = current_time
-                            except Exception as heartbeat_error:
-                                print(f"❌ Heartbeat error: {heartbeat_error}")
-                                break
+                        try:
+                            heartbeat_message = {
+                                "type": "heartbeat",
+                                "timestamp": time.time(),
+                                "session_id": session_id
+                            }
+                            # Sent as text so clients can tell heartbeats from binary point cloud messages
+                            data_channel.send(orjson.dumps(heartbeat_message).decode())
+                            logger.debug("💓 Sent heartbeat for session %s", session_id)
+                            last_heartbeat = current_time
+                        except Exception as heartbeat_error:
+                            logger.warning("❌ Heartbeat error: %s", heartbeat_error)
+                            break
                     
                     # Get latest point cloud data
                     point_cloud_data = self.realsense_manager.get_latest_metadata(device_id, "depth")
                     
-                    # Temporarily disable debug logging to avoid NumPy array boolean context issues
-                    # TODO: Re-enable once NumPy array issues are resolved
-                    # Debug logging
-                    # if point_cloud_data is None:
-                    #     print(f"📡 No point cloud data available for device {device_id}")
-                    # elif not point_cloud_data.get("point_cloud"):
-                    #     print(f"📡 Point cloud data has no point_cloud key: {point_cloud_data.keys()}")
-                    # elif not point_cloud_data["point_cloud"].get("vertices"):
-                    #     print(f"📡 Point cloud data has no vertices: {point_cloud_data['point_cloud'].keys()}")
-                    # else:
-                    #     vertices_count = safe_len(point_cloud_data['point_cloud']['vertices'])
-                    #     print(f"📡 Got point cloud data with {vertices_count} vertices")
-                    
                     # Re-enable point cloud data sending with proper NumPy array handling
                     # Break down the complex boolean expression to avoid NumPy array boolean context issues
                     if point_cloud_data is None:
@@ -1131,126 +1604,78 @@ class WebRTCManager:
                     if vertices_data is None:
                         continue
                     
-                    vertices_count = safe_len(vertices_data)
-                    if vertices_count <= 0:
+                    # Coerce once to an (N, 3) float32 array; chunks below are then just row slices
+                    try:
+                        all_vertices = np.ascontiguousarray(vertices_data, dtype=np.float32).reshape(-1, 3)
+                    except (TypeError, ValueError):
+                        logger.warning("❌ Invalid vertex format: %s", getattr(vertices_data, "shape", type(vertices_data)))
+                        continue
+                    vertices_count = all_vertices.shape[0]
+                    if vertices_count == 0:
                         continue
                     
-                    # Check if data channel is still open
-                    if data_channel.readyState == "open":
-                        # Send point cloud data through data channel
-                        
-                        # Get vertices and safely convert to list
-                        vertices = safe_convert_vertices(vertices_data)
-                            
-                        if safe_len(vertices) == 0:
-                            print(f"📡 No valid vertices data, skipping")
-                            continue
-                        
-                        # Debug logging to see what we're getting
-                        print(f"🔍 DEBUG: vertices type: {type(vertices)}")
-                        if safe_len(vertices) > 0:
-                            print(f"🔍 DEBUG: first vertex: {vertices[0]}, type: {type(vertices[0])}")
-                        
-                        # Validate first vertex to ensure proper format
-                        if safe_len(vertices) > 0:
-                            first_vertex = vertices[0]
-                            # Convert first_vertex to list if it's a NumPy array
-                            if hasattr(first_vertex, 'tolist'):
-                                first_vertex = first_vertex.tolist()
-                            if not isinstance(first_vertex, (list, tuple)) or len(first_vertex) != 3:
-                                print(f"❌ Invalid vertex format: {first_vertex}")
-                                continue
-                        
-                        max_vertices = 3000  # Reduced to 3K vertices per message for faster updates
-                        
-                        if safe_len(vertices) > max_vertices:
-                            original_count = safe_len(vertices)
-                            vertices = vertices[:max_vertices]
-                            print(f"📡 Limiting point cloud data to {max_vertices} vertices (original: {original_count})")
-                        
-                        data_message = {
-                            "type": "pointcloud-data",
-                            "device_id": device_id,
-                            "vertices": vertices,  # Direct array, not nested object
-                            "timestamp": time.time(),
-                            "total_vertices": safe_len(vertices),
-                            "sent_vertices": safe_len(vertices)
-                        }
-                        
-                        # Send as JSON string with optimized chunking for faster updates
-                        try:
-                            max_vertices_per_chunk = 3000  # Send 3K vertices per chunk for faster transmission
-                            
-                            if safe_len(vertices) <= max_vertices_per_chunk:
-                                # Send as single message if small enough
-                                json_data = json.dumps(data_message)
-                                data_channel.send(json_data)
-                                print(f"📡 Sent point cloud data: {safe_len(vertices)} vertices (JSON size: {len(json_data)} bytes)")
-                            else:
-                                # Split vertices into multiple chunks
-                                import uuid
-                                message_id = str(uuid.uuid4())
-                                total_chunks = (safe_len(vertices) + max_vertices_per_chunk - 1) // max_vertices_per_chunk
-                                
-                                print(f"📡 Sending large point cloud data in {total_chunks} chunks: {safe_len(vertices)} vertices")
-                                
-                                for chunk_index in range(total_chunks):
-                                    start_vertex = chunk_index * max_vertices_per_chunk
-                                    end_vertex = min(start_vertex + max_vertices_per_chunk, safe_len(vertices))
-                                    chunk_vertices = vertices[start_vertex:end_vertex]
-                                    
-                                    # Create chunk message with complete JSON structure
-                                    chunk_message = {
-                                        "type": "pointcloud-data",
-                                        "device_id": device_id,
-                                        "vertices": chunk_vertices,
-                                        "timestamp": time.time(),
-                                        "total_vertices": safe_len(vertices),
-                                        "sent_vertices": safe_len(chunk_vertices),
-                                        "message_id": message_id,
-                                        "chunk_index": chunk_index,
-                                        "total_chunks": total_chunks,
-                                        "is_last_chunk": chunk_index == total_chunks - 1,
-                                        "chunk_info": True  # Flag to indicate this is a chunk
-                                    }
-                                    
-                                    chunk_json = json.dumps(chunk_message)
-                                    data_channel.send(chunk_json)
-                                    print(f"📡 Sent chunk {chunk_index + 1}/{total_chunks} with {safe_len(chunk_vertices)} vertices (JSON size: {len(chunk_json)} bytes)")
-                                    
-                                    # Minimal delay between chunks for faster transmission
-                                    await asyncio.sleep(0.0001)
-                                
-                                print(f"📡 Completed sending {total_chunks} chunks for message {message_id}")
-                                
-                        except Exception as json_error:
-                            print(f"❌ JSON serialization error: {json_error}")
-                            # Try with fewer vertices - ensure it's a list first
-                            if hasattr(vertices, 'tolist'):
-                                vertices = vertices.tolist()
-                            vertices = vertices[:1000]  # Reduce to 1K vertices
-                            data_message["vertices"] = vertices
-                            data_message["sent_vertices"] = safe_len(vertices)
-                            json_data = json.dumps(data_message)
-                            data_channel.send(json_data)
-                            print(f"📡 Sent reduced point cloud data: {safe_len(vertices)} vertices")
+                    # Adapt density to the send buffer so a slow receiver keeps getting fresh, sparser clouds
+                    buffered = data_channel.bufferedAmount
+                    if buffered > DATA_CHANNEL_HIGH_WATER:
+                        continue
+                    if buffered > DATA_CHANNEL_DECIMATE_WATER:
+                        stride = POINT_CLOUD_DECIMATION
+                    elif buffered < DATA_CHANNEL_LOW_WATER:
+                        stride = 1
+
+                    # Only the sent vertices go on the wire
+                    vertices = select_point_cloud_vertices(all_vertices, stride)
+                    if vertices_count > POINT_CLOUD_MAX_VERTICES:
+                        logger.debug("📡 Limiting point cloud data to %s vertices (original: %s)", POINT_CLOUD_MAX_VERTICES, vertices_count)
+
+                    # Millimeter int16 coordinates halve the payload; every chunk shares the scale and offset
+                    vertices, scale, offset = quantize_vertices(vertices)
+                    sent_vertices = vertices.shape[0]
+                    if sent_vertices == 0:
+                        continue
+                    total_chunks = -(-sent_vertices // POINT_CLOUD_CHUNK_VERTICES)
+                    message_id += 1
+                    # Per-update fields are set once; only the chunk fields change inside the loop
+                    header.update(
+                        timestamp=time.time(),
+                        total_vertices=sent_vertices,
+                        message_id=message_id,
+                        total_chunks=total_chunks,
+                        scale=scale,
+                        offset=offset,
+                        stride=stride,
+                    )
+                    for chunk_index, start in enumerate(range(0, sent_vertices, POINT_CLOUD_CHUNK_VERTICES)):
+                        if data_channel.bufferedAmount > DATA_CHANNEL_HIGH_WATER:
+                            # Slow receiver: wait for the buffer to drain rather than queueing more
+                            send_ready.clear()
+                            try:
+                                await asyncio.wait_for(send_ready.wait(), DATA_CHANNEL_DRAIN_TIMEOUT)
+                            except asyncio.TimeoutError:
+                                logger.debug("📡 Data channel still backed up, dropping point cloud update %s", message_id)
+                                break
+                        chunk_vertices = vertices[start:start + POINT_CLOUD_CHUNK_VERTICES]
+                        header.update(
+                            sent_vertices=chunk_vertices.shape[0],
+                            chunk_index=chunk_index,
+                            is_last_chunk=chunk_index == total_chunks - 1,
+                        )
+                        message = encode_point_cloud_message(header, chunk_vertices, message_buf)
+                        data_channel.send(message)
                     else:
-                        print(f"📡 Data channel is not open (state: {data_channel.readyState}), stopping transmission")
-                        break
-                    
-                    # Wait before sending next update - increased to 30 FPS for smoother updates
-                    await asyncio.sleep(0.033)  # ~30 FPS
-                    
+                        # Logged once per update rather than per chunk, and only when asked for
+                        if DEBUG_POINT_CLOUD_SENDS and logger.isEnabledFor(logging.DEBUG):
+                            logger.debug("📡 Sent %s point cloud vertices in %s chunks", sent_vertices, total_chunks)
+
                 except Exception as e:
-                    print(f"❌ Error sending point cloud data: {str(e)}")
+                    logger.warning("❌ Error sending point cloud data: %s", e)
                     # Check if session still exists
-                    async with self.lock:
-                        if session_id not in self.sessions:
-                            print(f"📡 Session {session_id} no longer exists, stopping transmission")
-                            break
+                    if closed.is_set():
+                        logger.debug("📡 Session %s no longer exists, stopping transmission", session_id)
+                        break
                     await asyncio.sleep(1)  # Wait longer on error
                     
         except Exception as e:
-            print(f"❌ Error in point cloud data transmission: {str(e)}")
+            logger.warning("❌ Error in point cloud data transmission: %s", e)
         finally:
-            print(f"🛑 Stopped point cloud data transmission for session {session_id}")
\ No newline at end of file
+            logger.info("🛑 Stopped point cloud data transmission for session %s", session_id)
\ No newline at end of file
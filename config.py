@@ -17,5 +17,7 @@ class Settings():
     TURN_SERVER: Optional[str] = None
     TURN_USERNAME: Optional[str] = None
     TURN_PASSWORD: Optional[str] = None
+    # FFmpeg hardware H.264 encoder for outgoing video (e.g. "h264_nvenc", "h264_v4l2m2m"); None keeps software encoding
+    VIDEO_HW_ENCODER: Optional[str] = None
 
 settings = Settings()
\ No newline at end of file
@@ -1,13 +1,17 @@
 import uvicorn
 import asyncio
 import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, ORJSONResponse
 
 from app.api.router import api_router
+from app.api.dependencies import get_webrtc_manager
 from app.core.errors import setup_exception_handlers
+from app.core.logs import setup_logging
 from config import settings
 import socketio
 from app.services.socketio import sio
@@ -16,11 +20,25 @@ from app.services.socketio import sio
 from robot_websocket_client import start_robot_websocket_client, stop_robot_websocket_client
 
 
+# Log through a background queue listener so handlers never block the event loop
+setup_logging()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Hot polling endpoints read the manager from app.state instead of resolving a dependency
+    app.state.webrtc_manager = get_webrtc_manager()
+    await app.state.webrtc_manager.start()
+    yield
+    await app.state.webrtc_manager.stop()
+
+
 # --- Create FastAPI App ---
 # Initialize FastAPI app with title and OpenAPI URL
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
 # Set up CORS
@@ -32,6 +50,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress larger JSON bodies (session listings, ICE candidates, point clouds)
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 # Set up routers
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
@@ -45,10 +66,16 @@ except Exception:
     # If static files can't be mounted, create a simple route for the demo
     pass
 
+# Demo pages don't appear or disappear while the server runs; check for them once at startup
+_DEMO_PAGES = {
+    page: os.path.exists(page)
+    for page in ("webrtc_demo.html", "webrtc_3d_pointcloud_demo.html", "test_3d_viewer_debug.html")
+}
+
 @app.get("/")
 async def root():
     """Serve the WebRTC demo page."""
-    if os.path.exists("webrtc_demo.html"):
+    if _DEMO_PAGES["webrtc_demo.html"]:
         return FileResponse("webrtc_demo.html")
     else:
         return {"message": "WebRTC demo not found. Please ensure webrtc_demo.html exists in the root directory."}
@@ -56,7 +83,7 @@ async def root():
 @app.get("/webrtc_demo.html")
 async def webrtc_demo():
     """Serve the WebRTC demo page directly."""
-    if os.path.exists("webrtc_demo.html"):
+    if _DEMO_PAGES["webrtc_demo.html"]:
         return FileResponse("webrtc_demo.html")
     else:
         return {"message": "WebRTC demo not found. Please ensure webrtc_demo.html exists in the root directory."}
@@ -64,7 +91,7 @@ async def webrtc_demo():
 @app.get("/webrtc_3d_pointcloud_demo.html")
 async def webrtc_3d_pointcloud_demo():
     """Serve the 3D point cloud demo page directly."""
-    if os.path.exists("webrtc_3d_pointcloud_demo.html"):
+    if _DEMO_PAGES["webrtc_3d_pointcloud_demo.html"]:
         return FileResponse("webrtc_3d_pointcloud_demo.html")
     else:
         return {"message": "3D point cloud demo not found. Please ensure webrtc_3d_pointcloud_demo.html exists in the root directory."}
@@ -72,7 +99,7 @@ async def webrtc_3d_pointcloud_demo():
 @app.get("/test_3d_viewer_debug.html")
 async def test_3d_viewer_debug():
     """Serve the 3D point cloud debug test page."""
-    if os.path.exists("test_3d_viewer_debug.html"):
+    if _DEMO_PAGES["test_3d_viewer_debug.html"]:
         return FileResponse("test_3d_viewer_debug.html")
     else:
         return {"message": "3D viewer debug test not found."}
@@ -98,6 +125,13 @@ if __name__ == "__main__":
         await stop_robot_websocket_client()
         robot_task.cancel()
     
+    # uvloop cuts per-await overhead for the many concurrent WebRTC sessions; optional on platforms without it
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
+
     try:
         asyncio.run(start_services())
     except KeyboardInterrupt:
@@ -1,6 +1,6 @@
 import asyncio
 import socketio
-import json
+import orjson
 import logging
 import os
 from typing import Dict, Any, Optional
@@ -13,19 +13,56 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+class _OrjsonCodec:
+    """json-module stand-in for Socket.IO packet encoding, backed by orjson."""
+
+    @staticmethod
+    def dumps(obj, **kwargs) -> str:
+        # Socket.IO passes stdlib options such as separators; orjson's output is already compact
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY).decode()
+
+    @staticmethod
+    def loads(data, **kwargs):
+        return orjson.loads(data)
+
+class _OrjsonPacket(socketio.packet.Packet):
+    """Socket.IO packet encoded with orjson.
+
+    Passed as the client's serializer rather than as json=, which python-socketio would set
+    on the shared Packet class and so also switch the app's own Socket.IO server to orjson.
+    """
+
+    json = _OrjsonCodec
+
 class RobotWebSocketClient:
     def __init__(self, cloud_url: str, robot_id: str):
         self.cloud_url = cloud_url
         self.robot_id = robot_id
-        self.sio = socketio.AsyncClient()
+        self.sio = socketio.AsyncClient(serializer=_OrjsonPacket)
         self.connected = False
         self.sessions = {}  # sessionId -> session data
         self.reconnect_attempts = 0
         self.max_reconnect_attempts = 5
         self.response_queue = []  # Queue to store responses when disconnected
         self.reconnect_delay = 5  # seconds
-        self.webrtc_manager = None  # Will be initialized when needed
+        self.webrtc_manager = None  # The app's shared WebRTCManager, looked up on the first session
+        self._http = None  # aiohttp.ClientSession for local API calls, created on first use
         
+    def _http_session(self):
+        """Return the shared aiohttp session, creating it on first use."""
+        if self._http is None or self._http.closed:
+            import aiohttp
+            self._http = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=4, ttl_dns_cache=300, keepalive_timeout=30)
+            )
+        return self._http
+
+    async def close_http(self):
+        """Close the shared aiohttp session, if one was opened."""
+        if self._http is not None:
+            await self._http.close()
+            self._http = None
+
     async def connect(self):
         """Connect to cloud signaling server"""
         try:
@@ -72,78 +109,27 @@ class RobotWebSocketClient:
             # Don't immediately reconnect - let the main reconnection logic handle it
             logger.info("🔄 Disconnect detected, will reconnect via main logic")
             
-        # Use direct event listeners instead of decorators
-        self.sio.on('create-session', self.handle_create_session_direct)
-        self.sio.on('switch-stream-type', self.handle_switch_stream_type_direct)
-        self.sio.on('webrtc-answer', self.handle_webrtc_answer_direct)
-        self.sio.on('ice-candidate', self.handle_ice_candidate_direct)
-        # Point cloud data is now handled via WebRTC data channels, not Socket.IO
-        # self.sio.on('get-pointcloud-data', self.handle_get_pointcloud_data_direct)
-        self.sio.on('activate-pointcloud', self.handle_activate_pointcloud_direct)
-        self.sio.on('start-device-stream', self.handle_start_device_stream_direct)
-        self.sio.on('stop-device-stream', self.handle_stop_device_stream_direct)
-        
-        @self.sio.event
-        async def create_session(data):
-            logger.info(f"📡 Received create-session event: {data}")
-            try:
-                await self.handle_create_session(data)
-                logger.info(f"✅ Successfully handled create-session event for session {data.get('sessionId', 'unknown')}")
-            except Exception as e:
-                logger.error(f"❌ Error handling create-session event: {e}")
-                import traceback
-                logger.error(f"❌ Traceback: {traceback.format_exc()}")
-                
-        # Add a catch-all event listener for create-session specifically
-        @self.sio.event
-        async def create_session_alt(data):
-            logger.info(f"📡 Received create-session-alt event: {data}")
-            
-        # Add a catch-all event listener for any event with 'session' in the name
-        @self.sio.event
-        async def session_event(data):
-            logger.info(f"📡 Received session event: {data}")
-            
-        @self.sio.event
-        async def webrtc_answer(data):
-            await self.handle_webrtc_answer(data)
-            
-        @self.sio.event
-        async def webrtc_answer_alt(data):
-            await self.handle_webrtc_answer(data)
-            
-        @self.sio.event
-        async def ice_candidate(data):
-            await self.handle_ice_candidate(data)
-            
-        @self.sio.event
-        async def ice_candidate_alt(data):
-            await self.handle_ice_candidate(data)
-            
-        @self.sio.event
-        async def session_closed(data):
-            await self.handle_session_closed(data)
-            
-        # Add a general event listener to catch all events
-        @self.sio.event
-        async def message(data):
-            logger.info(f"📨 Received general message event: {data}")
-            
-        # Add a catch-all event listener for debugging
-        @self.sio.event
-        async def any_event(event, data):
-            logger.info(f"📨 Received event '{event}' with data: {data}")
-            
-        # Add a simple test event listener
-        @self.sio.event
-        async def test(data):
-            logger.info(f"🧪 Received test event: {data}")
-            
-        # Add a simple ping event listener
-        @self.sio.event
-        async def ping(data):
-            logger.info(f"🏓 Received ping event: {data}")
-            await self.sio.emit('pong', {'response': 'pong'})
+        # One registration per event name; handlers log and report their own errors.
+        # The underscore and _alt names are aliases some signaling servers emit.
+        for event, handler in (
+            ('create-session', self.handle_create_session),
+            ('create_session', self.handle_create_session),
+            ('switch-stream-type', self.handle_switch_stream_type),
+            ('webrtc-answer', self.handle_webrtc_answer),
+            ('webrtc_answer', self.handle_webrtc_answer),
+            ('webrtc_answer_alt', self.handle_webrtc_answer),
+            ('ice-candidate', self.handle_ice_candidate),
+            ('ice_candidate', self.handle_ice_candidate),
+            ('ice_candidate_alt', self.handle_ice_candidate),
+            ('session_closed', self.handle_session_closed),
+            # Point cloud data is now handled via WebRTC data channels, not Socket.IO
+            # ('get-pointcloud-data', self.handle_get_pointcloud_data),
+            ('activate-pointcloud', self.handle_activate_pointcloud),
+            ('start-device-stream', self.handle_start_device_stream),
+            ('stop-device-stream', self.handle_stop_device_stream),
+            ('ping', self.handle_ping),
+        ):
+            self.sio.on(event, handler)
             
     async def handle_reconnect(self):
         """Handle reconnection with exponential backoff"""
@@ -211,27 +197,24 @@ class RobotWebSocketClient:
     async def get_device_info(self):
         """Get device information from RealSense manager"""
         try:
-            # Use a simple approach - get device info from the API
-            import aiohttp
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.get('http://localhost:8000/api/devices/') as response:
-                    if response.status == 200:
-                        devices = await response.json()
-                        if devices:
-                            device = devices[0]  # Use first device
-                            return {
-                                "name": f"RealSense Robot {self.robot_id}",
-                                "deviceId": device["device_id"],
-                                "serialNumber": device["serial_number"],
-                                "firmwareVersion": device["firmware_version"],
-                                "sensors": device["sensors"],
-                                "capabilities": ["color", "depth", "infrared", "pointcloud"],
-                                "status": "available",
-                                "lastSeen": datetime.now().isoformat()
-                            }
+            # The API runs in this process, so ask the RealSense manager directly instead of over HTTP
+            from app.api.dependencies import get_realsense_manager
+
+            devices = await asyncio.to_thread(get_realsense_manager().get_devices)
+            if devices:
+                device = devices[0]  # Use first device
+                return {
+                    "name": f"RealSense Robot {self.robot_id}",
+                    "deviceId": device.device_id,
+                    "serialNumber": device.serial_number,
+                    "firmwareVersion": device.firmware_version,
+                    "sensors": device.sensors,
+                    "capabilities": ["color", "depth", "infrared", "pointcloud"],
+                    "status": "available",
+                    "lastSeen": datetime.now().isoformat()
+                }
             
-            # Fallback if API call fails
+            # Fallback if no device is connected
             return {
                 "name": f"RealSense Robot {self.robot_id}",
                 "deviceId": "844212070924",  # Default device ID
@@ -252,49 +235,14 @@ class RobotWebSocketClient:
             
 
             
-    async def handle_create_session_direct(self, data):
-        """Direct event handler for create-session (non-async)"""
-        logger.info(f"🎯 Direct create-session handler called with data: {data}")
-        try:
-            await self.handle_create_session(data)
-        except Exception as e:
-            logger.error(f"❌ Error in direct create-session handler: {e}")
-            import traceback
-            logger.error(f"❌ Traceback: {traceback.format_exc()}")
-    
-    async def handle_webrtc_answer_direct(self, data):
-        """Direct event handler for webrtc-answer (non-async)"""
-        logger.info(f"🎯 Direct webrtc-answer handler called with data: {data}")
-        try:
-            await self.handle_webrtc_answer(data)
-        except Exception as e:
-            logger.error(f"❌ Error in direct webrtc-answer handler: {e}")
-            import traceback
-            logger.error(f"❌ Traceback: {traceback.format_exc()}")
-    
-    async def handle_ice_candidate_direct(self, data):
-        """Direct event handler for ice-candidate (non-async)"""
-        logger.info(f"🎯 Direct ice-candidate handler called with data: {data}")
-        try:
-            await self.handle_ice_candidate(data)
-        except Exception as e:
-            logger.error(f"❌ Error in direct ice-candidate handler: {e}")
-            import traceback
-            logger.error(f"❌ Traceback: {traceback.format_exc()}")
+    async def handle_ping(self, data):
+        """Answer an application-level ping from the cloud server"""
+        logger.debug("ping event: %s", data)
+        await self.sio.emit('pong', {'response': 'pong'})
 
-    async def handle_switch_stream_type_direct(self, data):
-        """Direct event handler for switch-stream-type (non-async)"""
-        logger.info(f"🎯 Direct switch-stream-type handler called with data: {data}")
-        try:
-            await self.handle_switch_stream_type(data)
-        except Exception as e:
-            logger.error(f"❌ Error in direct switch-stream-type handler: {e}")
-            import traceback
-            logger.error(f"❌ Traceback: {traceback.format_exc()}")
-    
     async def handle_create_session(self, data: Dict[str, Any]):
         """Handle WebRTC session creation request"""
-        logger.info(f"🔍 handle_create_session called with data: {data}")
+        logger.debug("create-session event: %s", data)
         session_id = data["sessionId"]
         device_id = data["deviceId"]
         stream_types = data["streamTypes"]
@@ -307,14 +255,11 @@ class RobotWebSocketClient:
             import os
             sys.path.append(os.path.dirname(os.path.abspath(__file__)))
             
-            from app.services.webrtc_manager import WebRTCManager
-            from app.api.dependencies import get_realsense_manager
-            
-            # Get the existing realsense manager instance
-            realsense_manager = get_realsense_manager()
+            from app.api.dependencies import get_webrtc_manager
             
-            # Create WebRTC offer using local WebRTC manager
-            self.webrtc_manager = WebRTCManager(realsense_manager)
+            # Share the app's WebRTC manager so stream references and tracks are shared across sessions
+            if self.webrtc_manager is None:
+                self.webrtc_manager = get_webrtc_manager()
             offer_response = await self.webrtc_manager.create_offer(device_id, stream_types, session_id)
             
             if offer_response:
@@ -327,7 +272,6 @@ class RobotWebSocketClient:
                     "deviceId": device_id,
                     "streamTypes": stream_types,
                     "apiSessionId": api_session_id,
-                    "webrtcManager": self.webrtc_manager,
                     "createdAt": datetime.now()
                 }
                 
@@ -355,6 +299,7 @@ class RobotWebSocketClient:
 
     async def handle_switch_stream_type(self, data: Dict[str, Any]):
         """Handle stream type switching within an existing session"""
+        logger.debug("switch-stream-type event: %s", data)
         cloud_session_id = data.get('sessionId')
         new_stream_types = data.get('streamTypes', [])
         
@@ -385,8 +330,7 @@ class RobotWebSocketClient:
         
         logger.info(f"🔄 Using API session ID {api_session_id} for stream type switch")
         
-        # Get the WebRTC manager from the session data
-        webrtc_manager = session_data.get('webrtcManager')
+        webrtc_manager = self.webrtc_manager
         if not webrtc_manager:
             logger.error(f"❌ WebRTC manager not found for cloud session {cloud_session_id}")
             await self.sio.emit('stream-type-switch-error', {
@@ -423,13 +367,14 @@ class RobotWebSocketClient:
             
     async def handle_webrtc_answer(self, data: Dict[str, Any]):
         """Handle WebRTC answer from client"""
+        logger.debug("webrtc-answer event: %s", data)
         session_id = data["sessionId"]
         answer = data["answer"]
         
         if session_id in self.sessions:
             try:
                 session_data = self.sessions[session_id]
-                webrtc_manager = session_data["webrtcManager"]
+                webrtc_manager = self.webrtc_manager
                 
                 # Process answer using local WebRTC manager
                 await webrtc_manager.process_answer(
@@ -445,13 +390,14 @@ class RobotWebSocketClient:
                 
     async def handle_ice_candidate(self, data: Dict[str, Any]):
         """Handle ICE candidate from client"""
+        logger.debug("ice-candidate event: %s", data)
         session_id = data["sessionId"]
         candidate = data["candidate"]
         
         if session_id in self.sessions:
             try:
                 session_data = self.sessions[session_id]
-                webrtc_manager = session_data["webrtcManager"]
+                webrtc_manager = self.webrtc_manager
                 
                 # Add ICE candidate using local WebRTC manager
                 await webrtc_manager.add_ice_candidate(
@@ -460,7 +406,7 @@ class RobotWebSocketClient:
                     candidate["sdpMid"],
                     candidate["sdpMLineIndex"]
                 )
-                logger.debug(f"✅ Added ICE candidate for session {session_id}")
+                logger.debug("✅ Added ICE candidate for session %s", session_id)
             except Exception as e:
                 logger.error(f"❌ Failed to add ICE candidate for session {session_id}: {e}")
         else:
@@ -468,6 +414,7 @@ class RobotWebSocketClient:
             
     async def handle_session_closed(self, data: Dict[str, Any]):
         """Handle session closure notification"""
+        logger.debug("session_closed event: %s", data)
         session_id = data["sessionId"]
         
         if session_id in self.sessions:
@@ -475,7 +422,7 @@ class RobotWebSocketClient:
             # Clean up WebRTC session using local WebRTC manager
             try:
                 session_data = self.sessions[session_id]
-                webrtc_manager = session_data["webrtcManager"]
+                webrtc_manager = self.webrtc_manager
                 
                 # Close session using local WebRTC manager
                 await webrtc_manager.close_session(session_data["apiSessionId"])
@@ -488,39 +435,34 @@ class RobotWebSocketClient:
         else:
             logger.warning(f"⚠️ Session {session_id} not found for cleanup")
 
-    async def handle_get_pointcloud_data_direct(self, data: Dict[str, Any]):
-        """Direct handler for get-pointcloud-data event."""
-        logger.info(f"🎯 Direct get-pointcloud-data handler called with data: {data}")
-        await self.handle_get_pointcloud_data(data)
-
     async def handle_get_pointcloud_data(self, data: Dict[str, Any]):
         """Handle point cloud data request."""
+        logger.debug("get-pointcloud-data event: %s", data)
         try:
             device_id = data.get('deviceId')
             logger.info(f"📡 Requesting point cloud data for device {device_id}")
             
             # Get point cloud data from RealSense manager
-            import aiohttp
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f'http://localhost:8000/api/webrtc/pointcloud-data/{device_id}') as response:
-                    if response.status == 200:
-                        pointcloud_data = await response.json()
-                        logger.info(f"✅ Retrieved point cloud data for device {device_id}")
-                        # Point cloud data is now sent via WebRTC data channels, not Socket.IO
-                        # if self.sio.connected:
-                        #     await self.sio.emit('pointcloud-data', pointcloud_data)
-                        # else:
-                        #     logger.warning("⚠️ Socket.IO not connected, queuing point cloud data")
-                        #     await self.queue_response('pointcloud-data', pointcloud_data)
-                    else:
-                        error_text = await response.text()
-                        logger.error(f"❌ Failed to get point cloud data: {error_text}")
-                        # Point cloud errors are now handled via WebRTC data channels, not Socket.IO
-                        # if self.sio.connected:
-                        #     await self.sio.emit('pointcloud-error', {'error': f'Failed to get point cloud data: {error_text}'})
-                        # else:
-                        #     logger.warning("⚠️ Socket.IO not connected, queuing error")
-                        #     await self.queue_response('pointcloud-error', {'error': f'Failed to get point cloud data: {error_text}'})
+            session = self._http_session()
+            async with session.get(f'http://localhost:8000/api/webrtc/pointcloud-data/{device_id}') as response:
+                if response.status == 200:
+                    pointcloud_data = await response.json()
+                    logger.info(f"✅ Retrieved point cloud data for device {device_id}")
+                    # Point cloud data is now sent via WebRTC data channels, not Socket.IO
+                    # if self.sio.connected:
+                    #     await self.sio.emit('pointcloud-data', pointcloud_data)
+                    # else:
+                    #     logger.warning("⚠️ Socket.IO not connected, queuing point cloud data")
+                    #     await self.queue_response('pointcloud-data', pointcloud_data)
+                else:
+                    error_text = await response.text()
+                    logger.error(f"❌ Failed to get point cloud data: {error_text}")
+                    # Point cloud errors are now handled via WebRTC data channels, not Socket.IO
+                    # if self.sio.connected:
+                    #     await self.sio.emit('pointcloud-error', {'error': f'Failed to get point cloud data: {error_text}'})
+                    # else:
+                    #     logger.warning("⚠️ Socket.IO not connected, queuing error")
+                    #     await self.queue_response('pointcloud-error', {'error': f'Failed to get point cloud data: {error_text}'})
                         
         except Exception as e:
             logger.error(f"❌ Error getting point cloud data: {e}")
@@ -531,40 +473,35 @@ class RobotWebSocketClient:
             #     logger.warning("⚠️ Socket.IO not connected, queuing error")
             #     await self.queue_response('pointcloud-error', {'error': f'Error getting point cloud data: {str(e)}'})
 
-    async def handle_activate_pointcloud_direct(self, data: Dict[str, Any]):
-        """Direct handler for activate-pointcloud event."""
-        logger.info(f"🎯 Direct activate-pointcloud handler called with data: {data}")
-        await self.handle_activate_pointcloud(data)
-
     async def handle_activate_pointcloud(self, data: Dict[str, Any]):
         """Handle point cloud activation request."""
+        logger.debug("activate-pointcloud event: %s", data)
         try:
             device_id = data.get('deviceId')
             enabled = data.get('enabled', True)
             logger.info(f"📡 {'Activating' if enabled else 'Deactivating'} point cloud for device {device_id}")
             
             # Activate/deactivate point cloud via RealSense manager
-            import aiohttp
-            async with aiohttp.ClientSession() as session:
-                async with session.post(f'http://localhost:8000/api/devices/{device_id}/point_cloud/activate', 
-                                      json={'enabled': enabled}) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        logger.info(f"✅ {'Activated' if enabled else 'Deactivated'} point cloud for device {device_id}")
-                        # Send back to cloud server
-                        if self.sio.connected:
-                            await self.sio.emit('pointcloud-activated', result)
-                        else:
-                            logger.warning("⚠️ Socket.IO not connected, queuing activation confirmation")
-                            await self.queue_response('pointcloud-activated', result)
+            session = self._http_session()
+            async with session.post(f'http://localhost:8000/api/devices/{device_id}/point_cloud/activate', 
+                                  json={'enabled': enabled}) as response:
+                if response.status == 200:
+                    result = await response.json()
+                    logger.info(f"✅ {'Activated' if enabled else 'Deactivated'} point cloud for device {device_id}")
+                    # Send back to cloud server
+                    if self.sio.connected:
+                        await self.sio.emit('pointcloud-activated', result)
+                    else:
+                        logger.warning("⚠️ Socket.IO not connected, queuing activation confirmation")
+                        await self.queue_response('pointcloud-activated', result)
+                else:
+                    error_text = await response.text()
+                    logger.error(f"❌ Failed to activate point cloud: {error_text}")
+                    if self.sio.connected:
+                        await self.sio.emit('pointcloud-error', {'error': f'Failed to activate point cloud: {error_text}'})
                     else:
-                        error_text = await response.text()
-                        logger.error(f"❌ Failed to activate point cloud: {error_text}")
-                        if self.sio.connected:
-                            await self.sio.emit('pointcloud-error', {'error': f'Failed to activate point cloud: {error_text}'})
-                        else:
-                            logger.warning("⚠️ Socket.IO not connected, queuing error")
-                            await self.queue_response('pointcloud-error', {'error': f'Failed to activate point cloud: {error_text}'})
+                        logger.warning("⚠️ Socket.IO not connected, queuing error")
+                        await self.queue_response('pointcloud-error', {'error': f'Failed to activate point cloud: {error_text}'})
                         
         except Exception as e:
             logger.error(f"❌ Error activating point cloud: {e}")
@@ -574,64 +511,54 @@ class RobotWebSocketClient:
                 logger.warning("⚠️ Socket.IO not connected, queuing error")
                 await self.queue_response('pointcloud-error', {'error': f'Error activating point cloud: {str(e)}'})
 
-    async def handle_start_device_stream_direct(self, data: Dict[str, Any]):
-        """Direct handler for start-device-stream event."""
-        logger.info(f"🎯 Direct start-device-stream handler called with data: {data}")
-        await self.handle_start_device_stream(data)
-
     async def handle_start_device_stream(self, data: Dict[str, Any]):
         """Handle device stream start request."""
+        logger.debug("start-device-stream event: %s", data)
         try:
             device_id = data.get('deviceId')
             stream_configs = data.get('streamConfigs', [])
             logger.info(f"🚀 Starting device stream for {device_id} with configs: {stream_configs}")
             
             # Call local API to start device stream
-            import aiohttp
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"http://localhost:8000/api/devices/{device_id}/streams/start",
-                    json={"stream_configs": stream_configs}
-                ) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        logger.info(f"✅ Device stream started: {result}")
-                        # Forward success response back to client
-                        await self.sio.emit('device-stream-started', {"deviceId": device_id, "result": result})
-                    else:
-                        error_text = await response.text()
-                        logger.error(f"❌ Failed to start device stream: {error_text}")
-                        await self.sio.emit('pointcloud-error', {"error": f"Failed to start device stream: {error_text}"})
+            session = self._http_session()
+            async with session.post(
+                f"http://localhost:8000/api/devices/{device_id}/streams/start",
+                json={"stream_configs": stream_configs}
+            ) as response:
+                if response.status == 200:
+                    result = await response.json()
+                    logger.info(f"✅ Device stream started: {result}")
+                    # Forward success response back to client
+                    await self.sio.emit('device-stream-started', {"deviceId": device_id, "result": result})
+                else:
+                    error_text = await response.text()
+                    logger.error(f"❌ Failed to start device stream: {error_text}")
+                    await self.sio.emit('pointcloud-error', {"error": f"Failed to start device stream: {error_text}"})
         except Exception as e:
             logger.error(f"❌ Error starting device stream: {str(e)}")
             await self.sio.emit('pointcloud-error', {"error": f"Error starting device stream: {str(e)}"})
 
-    async def handle_stop_device_stream_direct(self, data: Dict[str, Any]):
-        """Direct handler for stop-device-stream event."""
-        logger.info(f"🎯 Direct stop-device-stream handler called with data: {data}")
-        await self.handle_stop_device_stream(data)
-
     async def handle_stop_device_stream(self, data: Dict[str, Any]):
         """Handle device stream stop request."""
+        logger.debug("stop-device-stream event: %s", data)
         try:
             device_id = data.get('deviceId')
             logger.info(f"⏹️ Stopping device stream for {device_id}")
             
             # Call local API to stop device stream
-            import aiohttp
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"http://localhost:8000/api/devices/{device_id}/streams/stop"
-                ) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        logger.info(f"✅ Device stream stopped: {result}")
-                        # Forward success response back to client
-                        await self.sio.emit('device-stream-stopped', {"deviceId": device_id, "result": result})
-                    else:
-                        error_text = await response.text()
-                        logger.error(f"❌ Failed to stop device stream: {error_text}")
-                        await self.sio.emit('pointcloud-error', {"error": f"Failed to stop device stream: {error_text}"})
+            session = self._http_session()
+            async with session.post(
+                f"http://localhost:8000/api/devices/{device_id}/streams/stop"
+            ) as response:
+                if response.status == 200:
+                    result = await response.json()
+                    logger.info(f"✅ Device stream stopped: {result}")
+                    # Forward success response back to client
+                    await self.sio.emit('device-stream-stopped', {"deviceId": device_id, "result": result})
+                else:
+                    error_text = await response.text()
+                    logger.error(f"❌ Failed to stop device stream: {error_text}")
+                    await self.sio.emit('pointcloud-error', {"error": f"Failed to stop device stream: {error_text}"})
         except Exception as e:
             logger.error(f"❌ Error stopping device stream: {str(e)}")
             await self.sio.emit('pointcloud-error', {"error": f"Error stopping device stream: {str(e)}"})
@@ -662,6 +589,7 @@ async def stop_robot_websocket_client():
         logger.info("🛑 Stopping robot WebSocket client")
         await robot_client.sio.disconnect()
         robot_client.connected = False
+        await robot_client.close_http()
 
 # For testing
 if __name__ == "__main__":
@@ -1,4 +1,5 @@
 #!/bin/bash
 
 # Start the FastAPI server
-uvicorn main:combined_app --host 0.0.0.0 --port 8000
\ No newline at end of file
+# uvloop is in requirements.txt on Linux/macOS; pin it rather than relying on --loop auto
+uvicorn main:combined_app --host 0.0.0.0 --port 8000 --loop uvloop
\ No newline at end of file
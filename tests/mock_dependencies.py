@@ -4,6 +4,7 @@ import pytest
 import app.api.dependencies as dependencies
 from app.services.rs_manager import RealSenseManager
 from app.services.webrtc_manager import WebRTCManager
+from main import app
 
 
 class DummyOfferStat:
@@ -41,6 +42,9 @@ def patch_dependencies(monkeypatch):
     monkeypatch.setattr(dependencies, "_realsense_manager", rs_manager)
     monkeypatch.setattr(dependencies, "_webrtc_manager", webrtc_manager)
 
+    # Polling endpoints read the manager from app.state (normally set in lifespan)
+    monkeypatch.setattr(app.state, "webrtc_manager", webrtc_manager, raising=False)
+
     # Return the mocks for use in tests
     return {
         "rs_manager": rs_manager,
@@ -1,11 +1,16 @@
+import asyncio
+import threading
 import pytest
 import numpy as np
+import orjson
 from unittest.mock import AsyncMock, MagicMock, patch
 from fastapi.testclient import TestClient
 from fastapi import FastAPI
 from .setup_fake_devices import setup_fake_devices
 from .mock_dependencies import patch_dependencies, DummyOfferStat
 from .pyrealsense_mock import camera_info
+from app.api.endpoints import webrtc as webrtc_endpoints
+from app.services.rs_manager import FrameDoubleBuffer
 from main import app
 
 # Create test client
@@ -31,11 +36,11 @@ class TestRealSenseAPI:
             rs_manager.active_streams[device_id] = set(
                 [config.stream_type for config in configs]
             )
-            rs_manager.frame_queues[device_id] = {}
+            rs_manager.frame_buffers[device_id] = {}
 
             for config in configs:
                 stream_type = config.stream_type
-                rs_manager.frame_queues[device_id][stream_type] = []
+                rs_manager.frame_buffers[device_id][stream_type] = FrameDoubleBuffer()
 
                 # Add a fake frame to the queue
                 if stream_type.lower() == "depth":
@@ -79,9 +84,8 @@ class TestRealSenseAPI:
                     "height": config.resolution.height,
                 }
 
-                rs_manager.frame_queues[device_id][stream_type].append(
-                    (frame_data, metadata)
-                )
+                rs_manager.frame_buffers[device_id][stream_type].publish(frame_data)
+                rs_manager.metadata_queues.setdefault(device_id, {})[stream_type] = [metadata]
 
             # Update pipelines to indicate streaming
             rs_manager.pipelines[device_id] = MagicMock()
@@ -424,6 +428,106 @@ class TestRealSenseAPI:
         response = client.get(f"/api/webrtc/sessions/{session_id}")
         assert response.status_code == 404
 
+    def test_get_pointcloud_binary(self, setup_mock_managers):
+        rs_manager = setup_mock_managers["rs_manager"]
+        vertices = np.random.rand(100, 3).astype(np.float32)
+        rs_manager.pipelines["device1"] = MagicMock()
+        rs_manager.metadata_queues["device1"] = {
+            "depth": [
+                {
+                    "timestamp": 12345678,
+                    "frame_number": 42,
+                    "point_cloud": {"vertices": vertices, "texture_coordinates": []},
+                }
+            ]
+        }
+
+        response = client.get("/api/webrtc/pointcloud-data/device1/binary")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/octet-stream"
+        assert response.headers["x-vertex-count"] == "100"
+        assert response.headers["x-frame-number"] == "42"
+
+        received = np.frombuffer(response.content, dtype="<f4").reshape(-1, 3)
+        assert np.array_equal(received, vertices)
+
+        response = client.get(
+            "/api/webrtc/pointcloud-data/device1/binary",
+            headers={"If-None-Match": response.headers["etag"]},
+        )
+        assert response.status_code == 304
+
+    def test_get_pointcloud_data_not_modified(self, setup_mock_managers):
+        rs_manager = setup_mock_managers["rs_manager"]
+        rs_manager.pipelines["device1"] = MagicMock()
+        rs_manager.metadata_queues["device1"] = {
+            "depth": [
+                {
+                    "timestamp": 12345678,
+                    "frame_number": 42,
+                    "point_cloud": {
+                        "vertices": np.ones((10, 3), dtype=np.float32),
+                        "texture_coordinates": [],
+                    },
+                }
+            ]
+        }
+
+        response = client.get("/api/webrtc/pointcloud-data/device1")
+        assert response.status_code == 200
+        assert response.json()["vertex_count"] == 10
+        etag = response.headers["etag"]
+
+        response = client.get(
+            "/api/webrtc/pointcloud-data/device1", headers={"If-None-Match": etag}
+        )
+        assert response.status_code == 304
+
+
+class TestPointCloudSingleFlight:
+    def test_cancelled_leader_hands_the_encode_to_its_follower(self, monkeypatch):
+        # Large enough that the encode runs in the executor, where the leader can be cancelled
+        vertices = np.ones((webrtc_endpoints.EXECUTOR_MIN_ELEMENTS, 3), dtype=np.float32)
+        metadata = {"timestamp": 12345678, "frame_number": 42, "point_cloud": {"vertices": vertices}}
+        webrtc_manager = MagicMock(pointcloud_cache={}, pointcloud_inflight={})
+        webrtc_manager.realsense_manager.get_latest_metadata.return_value = metadata
+        request = MagicMock(headers={})
+        request.app.state.webrtc_manager = webrtc_manager
+
+        release = threading.Event()
+        encodes = []
+        encode = webrtc_endpoints._encode_pointcloud
+
+        def blocking_encode(*args):
+            encodes.append(args)
+            if len(encodes) == 1:
+                release.wait(5)
+            return encode(*args)
+
+        monkeypatch.setattr(webrtc_endpoints, "_encode_pointcloud", blocking_encode)
+
+        async def scenario():
+            leader = asyncio.create_task(webrtc_endpoints.get_pointcloud_data(request, "device1"))
+            while "device1" not in webrtc_manager.pointcloud_inflight:
+                await asyncio.sleep(0)
+            follower = asyncio.create_task(webrtc_endpoints.get_pointcloud_data(request, "device1"))
+            await asyncio.sleep(0)
+
+            leader.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await leader
+            release.set()
+            return await asyncio.wait_for(follower, 5)
+
+        response = asyncio.run(scenario())
+
+        assert response.status_code == 200
+        assert response.headers["etag"] == 'W/"device1-42"'
+        assert orjson.loads(response.body)["vertex_count"] == len(vertices)
+        assert len(encodes) == 2
+        assert webrtc_manager.pointcloud_cache["device1"] == (42, response.body)
+        assert webrtc_manager.pointcloud_inflight == {}
+
 
 class TestRealSenseAPIIntegration:
     """
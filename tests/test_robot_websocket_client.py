@@ -0,0 +1,40 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import numpy as np
+import socketio
+
+from app.services.socketio import sio
+from robot_websocket_client import RobotWebSocketClient
+
+
+class TestRobotClientSerializer:
+    def test_orjson_is_scoped_to_the_robot_client(self):
+        client = RobotWebSocketClient("http://localhost:3001", "robot-1")
+
+        encoded = client.sio.packet_class(socketio.packet.EVENT, ["frame", {"vertices": np.zeros(3)}]).encode()
+        assert encoded == '2["frame",{"vertices":[0.0,0.0,0.0]}]'
+
+        # The app's Socket.IO server keeps the stdlib codec
+        assert sio.packet_class is socketio.packet.Packet
+        assert socketio.packet.Packet.json is not client.sio.packet_class.json
+
+
+class TestRobotClientEvents:
+    def test_each_event_name_has_one_handler(self):
+        client = RobotWebSocketClient("http://localhost:3001", "robot-1")
+        client.setup_event_handlers()
+
+        handlers = client.sio.handlers["/"]
+        for event in ("create-session", "create_session", "webrtc-answer", "webrtc_answer", "webrtc_answer_alt"):
+            assert event in handlers
+        assert handlers["create_session"] == handlers["create-session"] == client.handle_create_session
+        assert handlers["ice_candidate_alt"] == client.handle_ice_candidate
+
+    def test_ping_is_answered_with_pong(self):
+        client = RobotWebSocketClient("http://localhost:3001", "robot-1")
+        client.sio.emit = AsyncMock()
+
+        asyncio.run(client.handle_ping({}))
+
+        client.sio.emit.assert_awaited_once_with("pong", {"response": "pong"})
@@ -0,0 +1,132 @@
+import threading
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+from app.core.errors import RealSenseError
+from app.models.device import DeviceInfo
+from app.models.stream import Resolution, StreamConfig
+from app.services.rs_manager import FrameDoubleBuffer, RealSenseManager
+
+
+def stream_config(stream_type: str) -> StreamConfig:
+    return StreamConfig(
+        sensor_id="device1-sensor-0",
+        stream_type=stream_type,
+        format="z16" if stream_type == "depth" else "rgb8",
+        resolution=Resolution(width=640, height=480),
+        framerate=30,
+    )
+
+
+def streaming_manager(*stream_types: str) -> RealSenseManager:
+    """A manager whose device1 looks like it is streaming the given types on a mock pipeline."""
+    rs_manager = RealSenseManager(MagicMock())
+    rs_manager.device_infos["device1"] = DeviceInfo(
+        device_id="device1", name="Test Device 1", serial_number="device1", is_streaming=True
+    )
+    rs_manager.pipelines["device1"] = MagicMock()
+    rs_manager.configs["device1"] = MagicMock()
+    rs_manager.stream_configs["device1"] = {
+        stream_type: stream_config(stream_type) for stream_type in stream_types
+    }
+    rs_manager.active_streams["device1"] = set(stream_types)
+    rs_manager.frame_buffers["device1"] = {stream_type: FrameDoubleBuffer() for stream_type in stream_types}
+    rs_manager.metadata_queues["device1"] = {stream_type: [] for stream_type in stream_types}
+    return rs_manager
+
+
+class TestFrameDoubleBuffer:
+    def test_read_frame_survives_later_publishes(self):
+        buffer = FrameDoubleBuffer()
+        first = np.zeros((4, 4, 3), dtype=np.uint8)
+        buffer.publish(first)
+
+        held = buffer.read()
+        for value in (1, 2, 3):
+            buffer.publish(np.full((4, 4, 3), value, dtype=np.uint8))
+
+        # Published arrays are handed out by reference and never written to again
+        assert held is first
+        assert not held.any()
+        assert (buffer.read() == 3).all()
+
+    def test_read_before_publish(self):
+        assert FrameDoubleBuffer().read() is None
+
+    def test_latest_frame_is_never_torn_by_the_producer(self):
+        rs_manager = RealSenseManager(MagicMock())
+        buffer = FrameDoubleBuffer()
+        buffer.publish(np.zeros((480, 640), dtype=np.uint16))
+        rs_manager.frame_buffers["device1"] = {"depth": buffer}
+        stop = threading.Event()
+
+        def produce():
+            value = 0
+            while not stop.is_set():
+                value = (value + 1) % 65536
+                with rs_manager.lock:
+                    buffer.publish(np.full((480, 640), value, dtype=np.uint16))
+
+        producer = threading.Thread(target=produce)
+        producer.start()
+        try:
+            for _ in range(200):
+                frame = rs_manager.get_latest_frame("device1", "depth")
+                value = frame.flat[0]
+                # Give the producer time to publish several frames after this one
+                threading.Event().wait(0.0005)
+                assert (frame == value).all()
+        finally:
+            stop.set()
+            producer.join()
+
+
+class TestUpdateStreams:
+    @pytest.fixture(autouse=True)
+    def rs_config(self, monkeypatch):
+        # Building a real rs.config needs the device's sensors
+        monkeypatch.setattr(
+            RealSenseManager,
+            "_build_rs_config",
+            lambda self, device_id, configs: (MagicMock(), {config.stream_type for config in configs}),
+        )
+
+    def test_failed_swap_restores_previous_pipeline(self):
+        rs_manager = streaming_manager("depth")
+        old_pipeline = rs_manager.pipelines["device1"]
+
+        with patch("app.services.rs_manager.rs.pipeline") as pipeline:
+            pipeline.return_value.start.side_effect = RuntimeError("Couldn't resolve requests")
+            with pytest.raises(RealSenseError):
+                rs_manager.enable_stream("device1", stream_config("color"))
+
+        old_pipeline.start.assert_called_once()
+        assert rs_manager.pipelines["device1"] is old_pipeline
+        assert rs_manager.active_streams["device1"] == {"depth"}
+
+    def test_failed_rollback_marks_device_stopped(self):
+        rs_manager = streaming_manager("depth")
+        rs_manager.pipelines["device1"].start.side_effect = RuntimeError("Device busy")
+
+        with patch("app.services.rs_manager.rs.pipeline") as pipeline:
+            pipeline.return_value.start.side_effect = RuntimeError("Couldn't resolve requests")
+            with pytest.raises(RealSenseError):
+                rs_manager.enable_stream("device1", stream_config("color"))
+
+        assert "device1" not in rs_manager.pipelines
+        assert "device1" not in rs_manager.frame_buffers
+        assert not rs_manager.device_infos["device1"].is_streaming
+
+    def test_swap_keeps_alignment_while_its_stream_runs(self):
+        rs_manager = streaming_manager("depth", "color")
+        align = ("color", MagicMock())
+        rs_manager.align_processors["device1"] = align
+
+        with patch("app.services.rs_manager.rs.pipeline"):
+            rs_manager.enable_stream("device1", stream_config("infrared-1"))
+            assert rs_manager.align_processors["device1"] is align
+
+            rs_manager.disable_stream("device1", "color")
+            assert "device1" not in rs_manager.align_processors
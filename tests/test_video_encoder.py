@@ -0,0 +1,31 @@
+from aiortc import rtcrtpsender
+from aiortc.codecs.vpx import Vp8Encoder
+from aiortc.rtcrtpparameters import RTCRtpCodecParameters
+
+from app.services import video_encoder
+from app.services.video_encoder import HardwareH264Encoder, install_hardware_encoder
+
+H264 = RTCRtpCodecParameters(mimeType="video/H264", clockRate=90000, payloadType=102)
+VP8 = RTCRtpCodecParameters(mimeType="video/VP8", clockRate=90000, payloadType=96)
+
+
+class TestInstallHardwareEncoder:
+    def test_routes_only_h264_to_the_hardware_encoder(self, monkeypatch):
+        monkeypatch.setattr(rtcrtpsender, "get_encoder", rtcrtpsender.get_encoder)
+
+        assert install_hardware_encoder("h264_v4l2m2m")
+        # Installing twice must not wrap the hardware lookup in another one
+        assert install_hardware_encoder("h264_v4l2m2m")
+
+        encoder = rtcrtpsender.get_encoder(H264)
+        assert isinstance(encoder, HardwareH264Encoder)
+        assert encoder.codec_name == "h264_v4l2m2m"
+        assert isinstance(rtcrtpsender.get_encoder(VP8), Vp8Encoder)
+
+    def test_skipped_on_unchecked_aiortc_versions(self, monkeypatch):
+        original = rtcrtpsender.get_encoder
+        monkeypatch.setattr(rtcrtpsender, "get_encoder", original)
+        monkeypatch.setattr(video_encoder.aiortc, "__version__", "2.0.0")
+
+        assert not install_hardware_encoder("h264_nvenc")
+        assert rtcrtpsender.get_encoder is original
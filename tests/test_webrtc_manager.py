@@ -0,0 +1,338 @@
+import asyncio
+import time
+from unittest.mock import MagicMock
+
+import numpy as np
+import orjson
+import pytest
+
+from app.models.stream import StreamStatus
+from app.services import webrtc_manager
+from app.services.webrtc_manager import (
+    POINT_CLOUD_DECIMATION,
+    POINT_CLOUD_MAX_VERTICES,
+    POINT_CLOUD_QUANTUM,
+    DATA_CHANNEL_DECIMATE_WATER,
+    RealSenseVideoTrack,
+    StreamActivationError,
+    WebRTCManager,
+    _project_stats,
+    encode_point_cloud_message,
+    quantize_vertices,
+)
+
+
+def decode_point_cloud_message(message: bytes):
+    """Split a binary point cloud message into its header dict and int16 vertex payload."""
+    header_length = int.from_bytes(message[:4], "little")
+    header = orjson.loads(message[4:4 + header_length])
+    vertices = np.frombuffer(message, dtype="<i2", offset=4 + header_length).reshape(-1, 3)
+    return header, vertices
+
+
+class FakeDataChannel:
+    """Data channel stand-in that records sent messages and closes the session after the first one."""
+
+    def __init__(self, buffered_amount: int, closed: asyncio.Event):
+        self.bufferedAmount = buffered_amount
+        self.bufferedAmountLowThreshold = 0
+        self.closed = closed
+        self.sent = []
+
+    def on(self, event, handler=None):
+        pass
+
+    def send(self, data):
+        self.sent.append(data)
+        self.closed.set()
+
+
+def send_one_point_cloud_update(vertices: np.ndarray, buffered_amount: int = 0):
+    """Run the point cloud sender for one update and return the messages it sent."""
+    rs_manager = MagicMock()
+    rs_manager.get_latest_metadata.return_value = {"point_cloud": {"vertices": vertices}}
+    manager = WebRTCManager(rs_manager)
+
+    async def run():
+        closed = asyncio.Event()
+        channel = FakeDataChannel(buffered_amount, closed)
+        manager.sessions["session1"] = {"data_channel": channel, "closed": closed}
+        registered = asyncio.Event()
+        registered.set()
+        await asyncio.wait_for(manager._send_point_cloud_data("session1", "device1", registered), 5)
+        return channel.sent
+
+    return asyncio.run(run())
+
+
+def dequantize(quantized: np.ndarray, scale: float, offset) -> np.ndarray:
+    return quantized / scale + np.asarray(offset)
+
+
+class TestPointCloudWireFormat:
+    def test_quantize_round_trip(self):
+        vertices = np.random.uniform([-1, -1, 0.2], [1, 1, 4], (1000, 3)).astype(np.float32)
+
+        quantized, scale, offset = quantize_vertices(vertices)
+
+        assert quantized.dtype == np.int16
+        assert scale == 1 / POINT_CLOUD_QUANTUM
+        assert np.abs(dequantize(quantized, scale, offset) - vertices).max() <= POINT_CLOUD_QUANTUM / 2 + 1e-6
+
+    def test_quantize_grows_the_step_for_large_clouds(self):
+        vertices = np.random.uniform(-100, 100, (1000, 3)).astype(np.float32)
+        vertices[0] = (-100, -100, -100)
+        vertices[1] = (100, 100, 100)
+
+        quantized, scale, offset = quantize_vertices(vertices)
+
+        assert scale < 1 / POINT_CLOUD_QUANTUM
+        assert np.abs(quantized).max() <= 32767
+        assert np.abs(dequantize(quantized, scale, offset) - vertices).max() <= 1 / scale
+
+    def test_quantize_drops_non_finite_rows(self):
+        vertices = np.array(
+            [[0.1, 0.2, 1.0], [np.nan, 0.0, 1.0], [0.0, np.inf, 1.0], [-0.1, -0.2, 2.0]],
+            dtype=np.float32,
+        )
+
+        quantized, scale, offset = quantize_vertices(vertices)
+
+        assert quantized.shape == (2, 3)
+        assert np.allclose(dequantize(quantized, scale, offset), vertices[[0, 3]], atol=POINT_CLOUD_QUANTUM)
+
+        quantized, _, _ = quantize_vertices(np.full((3, 3), np.nan, dtype=np.float32))
+        assert quantized.shape == (0, 3)
+
+    def test_message_round_trip(self):
+        vertices = np.arange(30, dtype=np.int16).reshape(-1, 3)
+        header = {"type": "pointcloud-data", "dtype": "i16", "scale": 1000.0, "offset": [0.5, -0.25, 2.0]}
+
+        message = encode_point_cloud_message(header, vertices)
+        header_length = int.from_bytes(message[:4], "little")
+
+        # The vertex payload starts 4-byte aligned for the browser's typed array
+        assert (4 + header_length) % 4 == 0
+        assert len(message) == 4 + header_length + vertices.nbytes
+        decoded_header, decoded_vertices = decode_point_cloud_message(message)
+        assert decoded_header == header
+        assert np.array_equal(decoded_vertices, vertices)
+        assert encode_point_cloud_message(header, vertices, bytearray()) == message
+
+
+class TestPointCloudSender:
+    def test_decimation_shrinks_capped_clouds(self):
+        vertices = np.random.uniform(-1, 1, (20 * POINT_CLOUD_MAX_VERTICES, 3)).astype(np.float32)
+
+        full = send_one_point_cloud_update(vertices)
+        decimated = send_one_point_cloud_update(vertices, DATA_CHANNEL_DECIMATE_WATER + 1)
+
+        full_header, _ = decode_point_cloud_message(full[0])
+        decimated_header, _ = decode_point_cloud_message(decimated[0])
+        assert full_header["total_vertices"] == POINT_CLOUD_MAX_VERTICES
+        assert decimated_header["total_vertices"] == POINT_CLOUD_MAX_VERTICES // POINT_CLOUD_DECIMATION
+        assert decimated_header["stride"] == POINT_CLOUD_DECIMATION
+
+        full_bytes = sum(len(message) for message in full)
+        decimated_bytes = sum(len(message) for message in decimated)
+        assert decimated_bytes < full_bytes / POINT_CLOUD_DECIMATION * 1.1
+
+    def test_chunks_carry_the_update_fields(self, monkeypatch):
+        monkeypatch.setattr(webrtc_manager, "POINT_CLOUD_CHUNK_VERTICES", 1000)
+        vertices = np.random.uniform([-1, -1, 0.2], [1, 1, 4], (2500, 3)).astype(np.float32)
+
+        messages = send_one_point_cloud_update(vertices)
+
+        decoded = [decode_point_cloud_message(message) for message in messages]
+        assert [header["chunk_index"] for header, _ in decoded] == [0, 1, 2]
+        assert [header["sent_vertices"] for header, _ in decoded] == [1000, 1000, 500]
+        assert [header["is_last_chunk"] for header, _ in decoded] == [False, False, True]
+        for header, _ in decoded:
+            assert header["total_chunks"] == 3
+            assert header["total_vertices"] == 2500
+            assert header["message_id"] == 1
+            assert header["device_id"] == "device1"
+
+        header = decoded[0][0]
+        received = dequantize(np.concatenate([chunk for _, chunk in decoded]), header["scale"], header["offset"])
+        assert np.abs(received - vertices).max() <= POINT_CLOUD_QUANTUM / 2 + 1e-6
+
+
+class TestVideoTrackClock:
+    def test_frame_clock_uses_aiortc_wall_clock(self):
+        track = RealSenseVideoTrack(MagicMock(), "device1", "depth")
+
+        async def first_timestamp():
+            pts, _ = await track.next_timestamp()
+            return pts
+
+        pts = asyncio.run(first_timestamp())
+
+        assert abs(track._start - time.time()) < 1
+        assert track._skip_missed_frames(pts) == pts
+        assert track.dropped_frames == 0
+
+
+class TestFrameRing:
+    def test_slots_are_reused_once_released(self):
+        track = RealSenseVideoTrack(MagicMock(), "device1", "color")
+
+        first = [id(track._next_frame(480, 640, "rgb24")[0]) for _ in range(webrtc_manager.FRAME_RING_SIZE)]
+        second = [id(track._next_frame(480, 640, "rgb24")[0]) for _ in range(webrtc_manager.FRAME_RING_SIZE)]
+
+        assert first == second
+
+    def test_held_frame_is_never_rewritten(self):
+        track = RealSenseVideoTrack(MagicMock(), "device1", "color")
+        # Like a relay viewer or an encoder thread still working on the frame
+        held, pixels = track._next_frame(480, 640, "rgb24")
+        pixels[:] = 7
+
+        for value in range(2 * webrtc_manager.FRAME_RING_SIZE):
+            frame, pixels = track._next_frame(480, 640, "rgb24")
+            assert frame is not held
+            pixels[:] = value
+
+        assert (held.to_ndarray() == 7).all()
+
+
+def streaming(*stream_types: str) -> StreamStatus:
+    return StreamStatus(device_id="device1", is_streaming=True, active_streams=list(stream_types))
+
+
+class TestStreamPlanning:
+    def test_reference_counts_drive_the_planned_streams(self):
+        manager = WebRTCManager(MagicMock())
+
+        # pointcloud is backed by the depth stream and counts it
+        assert manager._plan_stream_change("device1", add=["pointcloud"])
+        assert manager.stream_references["device1"] == {"pointcloud": 1, "depth": 1}
+        assert manager.device_stream_configs["device1"]["by_type"].keys() == {"depth"}
+        asyncio.run(manager._apply_stream_change("device1"))
+
+        # Already running and point cloud processing already on: nothing to apply
+        assert not manager._plan_stream_change("device1", add=["depth"])
+        assert manager.stream_references["device1"]["depth"] == 2
+
+        # depth stays referenced, but point cloud processing has to be switched off
+        assert manager._plan_stream_change("device1", remove=["pointcloud"])
+        assert manager.device_stream_configs["device1"]["by_type"].keys() == {"depth"}
+
+        assert manager._plan_stream_change("device1", remove=["depth"])
+        assert "device1" not in manager.stream_references
+        assert "device1" not in manager.device_stream_configs
+
+    def test_apply_starts_updates_and_stops_the_device(self):
+        rs_manager = MagicMock()
+        manager = WebRTCManager(rs_manager)
+
+        async def scenario():
+            assert await manager._ensure_device_stream("device1", ["depth"])
+            rs_manager.start_stream.assert_called_once()
+            rs_manager.activate_point_cloud.assert_not_called()
+
+            assert await manager._ensure_device_stream("device1", ["color", "pointcloud"])
+            _, kwargs = rs_manager.update_streams.call_args
+            assert [config.stream_type for config in kwargs["added"]] == ["color"]
+            assert kwargs["removed"] == []
+            rs_manager.activate_point_cloud.assert_called_once_with("device1", True)
+
+            await manager._decrement_stream_references("device1", ["depth", "color", "pointcloud"])
+            rs_manager.stop_stream.assert_called_once_with("device1")
+            assert manager._applied_streams == {}
+            assert manager.stream_references == {}
+
+        asyncio.run(scenario())
+
+    def test_failed_start_rolls_back_references(self):
+        rs_manager = MagicMock()
+        rs_manager.start_stream.side_effect = RuntimeError("No device connected")
+        manager = WebRTCManager(rs_manager)
+
+        with pytest.raises(StreamActivationError):
+            asyncio.run(manager._ensure_device_stream("device1", ["color"]))
+
+        assert manager.stream_references == {}
+        assert manager.device_stream_configs == {}
+
+    def test_decrement_many_reconfigures_each_device_once(self):
+        rs_manager = MagicMock()
+        manager = WebRTCManager(rs_manager)
+
+        async def scenario():
+            await manager._ensure_device_stream("device1", ["depth"])
+            await manager._ensure_device_stream("device2", ["color"])
+            rs_manager.stop_stream.side_effect = [RuntimeError("Device busy"), None]
+
+            # One failing device doesn't stop the others; unknown devices are ignored
+            await manager._decrement_many({"device1": ["depth"], "device2": ["color"], "device3": ["color"]})
+
+        asyncio.run(scenario())
+
+        assert sorted(call.args[0] for call in rs_manager.stop_stream.call_args_list) == ["device1", "device2"]
+        assert manager.stream_references == {}
+
+    def test_devices_are_reconfigured_independently(self):
+        rs_manager = MagicMock()
+        manager = WebRTCManager(rs_manager)
+
+        async def scenario():
+            device1_lock = manager._device_locks.setdefault("device1", asyncio.Lock())
+            async with device1_lock:
+                # device1 is mid-reconfiguration; device2 must not wait for it
+                await asyncio.wait_for(manager._ensure_device_stream("device2", ["color"]), 1)
+
+        asyncio.run(scenario())
+
+        rs_manager.start_stream.assert_called_once()
+        assert rs_manager.start_stream.call_args.args[0] == "device2"
+
+
+class TestWaitForStreams:
+    def test_running_device_is_ready_on_the_first_check(self):
+        rs_manager = MagicMock()
+        rs_manager.get_stream_status.return_value = streaming("depth", "color")
+        manager = WebRTCManager(rs_manager)
+
+        assert asyncio.run(manager._wait_for_streams("device1", ["color", "pointcloud"])) is None
+        assert rs_manager.get_stream_status.call_count == 1
+        listener = rs_manager.add_frame_listener.call_args.args[1]
+        rs_manager.remove_frame_listener.assert_called_once_with("device1", listener)
+
+    def test_waits_until_the_streams_come_up(self):
+        rs_manager = MagicMock()
+        rs_manager.get_stream_status.side_effect = [
+            StreamStatus(device_id="device1", is_streaming=False),
+            streaming("depth"),
+            streaming("depth", "color"),
+        ]
+        manager = WebRTCManager(rs_manager)
+
+        assert asyncio.run(manager._wait_for_streams("device1", ["color"])) is None
+        assert rs_manager.get_stream_status.call_count == 3
+
+    def test_reports_missing_streams_after_the_timeout(self, monkeypatch):
+        monkeypatch.setattr(webrtc_manager, "STREAM_READY_TIMEOUT", 0.05)
+        rs_manager = MagicMock()
+        rs_manager.get_stream_status.return_value = streaming("color")
+        manager = WebRTCManager(rs_manager)
+
+        not_ready = asyncio.run(manager._wait_for_streams("device1", ["color", "pointcloud"]))
+
+        assert "depth (required for pointcloud)" in not_ready
+        rs_manager.remove_frame_listener.assert_called_once()
+
+
+class TestProjectStats:
+    def test_keeps_only_reported_stat_fields(self):
+        outbound = MagicMock(spec=["type", "id", "timestamp", "bytesSent", "packetsSent", "ssrc"])
+        outbound.configure_mock(type="outbound-rtp", id="out1", timestamp=1.5, bytesSent=1200, packetsSent=10, ssrc=42)
+        transport = MagicMock(spec=["type", "id", "timestamp"])
+        transport.configure_mock(type="transport", id="t1", timestamp=1.5)
+
+        stats = _project_stats({"out1": outbound, "t1": transport})
+
+        assert stats == {
+            "out1": {"type": "outbound-rtp", "id": "out1", "timestamp": 1.5, "bytesSent": 1200, "packetsSent": 10},
+            "t1": {"type": "transport", "id": "t1", "timestamp": 1.5},
+        }